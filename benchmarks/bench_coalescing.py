@@ -0,0 +1,76 @@
+# benchmarks/bench_coalescing.py
+# Upstream calls and delta latency when many sessions infer deltas at once, with and without
+# micro-batching. Runs on the stub backend with a fixed per-call latency, so the saving shows up
+# as fewer calls (i.e. less rate limit used) rather than as provider-dependent timings.
+# Run from the repository root:
+#
+#     python -m benchmarks.bench_coalescing --sessions 64 --rounds 5 --batch-sizes 1 4 16 --wait 0.02
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import List
+
+from src.core.backends import StubBackend
+from src.core.cache import DeltaCache, set_delta_cache
+from src.core.llm import set_backend
+from src.core.updaters import (
+    process_interaction_to_emotional_delta, process_interaction_to_physical_delta, reset_delta_batchers
+)
+from src.utils.config import get_config, set_config
+
+# A few interactions every session is likely to send, plus per-session unique ones
+COMMON = ["I feed my pet", "I play fetch with my pet", "I give my pet a bath", "I pet my pet gently"]
+
+
+def play_round(session: int, round_index: int, start: threading.Barrier) -> float:
+    interaction = COMMON[session % len(COMMON)] if session % 2 else f"I teach my pet trick {session}-{round_index}"
+    start.wait()
+    started = time.perf_counter()
+    process_interaction_to_emotional_delta(interaction)
+    process_interaction_to_physical_delta(interaction)
+    return time.perf_counter() - started
+
+
+def run(sessions: int, rounds: int, batch_size: int, wait: float, latency: float, single_flight: bool):
+    set_config(replace(get_config(), backend="stub", delta_batch_size=batch_size, delta_batch_wait=wait,
+                       single_flight=single_flight))
+    reset_delta_batchers()
+    # No cache, so every round reaches the coalescing layer
+    set_delta_cache(DeltaCache(max_entries=0))
+    backend = StubBackend(latency=latency, seed=0)
+    set_backend(backend)
+    latencies: List[float] = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        for round_index in range(rounds):
+            barrier = threading.Barrier(sessions)
+            latencies.extend(pool.map(lambda s: play_round(s, round_index, barrier), range(sessions)))
+    elapsed = time.perf_counter() - started
+    requests = sessions * rounds * 2
+    latencies.sort()
+    return backend.call_count, requests, elapsed, latencies[len(latencies) // 2], latencies[int(0.95 * (len(latencies) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM calls saved by single-flight and delta micro-batching")
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[1, 4, 16])
+    parser.add_argument("--wait", type=float, default=0.02, help="delta_batch_wait in seconds")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated seconds per LLM call")
+    args = parser.parse_args()
+
+    print(f"{args.sessions} concurrent sessions x {args.rounds} rounds, {args.latency * 1000:.0f} ms per call")
+    print(f"{'batch':>6} {'flight':>7} {'calls':>7} {'requests':>9} {'saved':>7} {'p50 ms':>8} {'p95 ms':>8} {'total s':>8}")
+    for batch_size in args.batch_sizes:
+        for single_flight in (False, True):
+            calls, requests, elapsed, p50, p95 = run(args.sessions, args.rounds, batch_size, args.wait,
+                                                      args.latency, single_flight)
+            print(f"{batch_size:6d} {'on' if single_flight else 'off':>7} {calls:7d} {requests:9d} "
+                  f"{1 - calls / requests:7.0%} {p50 * 1000:8.1f} {p95 * 1000:8.1f} {elapsed:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_import_time.py
+# Cold-start cost of the CLI and of the lighter entry points, measured the way `python -X importtime`
+# reports it: every target is imported in a fresh interpreter, several times, and the median of the
+# target's cumulative import time is shown together with the wall time of the whole process.
+# Run from the repository root:
+#
+#     python -m benchmarks.bench_import_time --repeat 7
+#     python -m benchmarks.bench_import_time --detail main --top 15
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# main.py is the interactive CLI; states and formatters are what batch workers and tests import
+TARGETS = ["src.core.states", "src.utils.formatters", "src.core.pet", "src.game.game", "main"]
+
+# Modules whose presence after the import shows who paid for the API client stack
+HEAVY_MODULES = ["openai", "httpx", "dotenv", "numpy", "sqlite3"]
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def run_import(target: str) -> Tuple[float, List[Tuple[int, int, str]], List[str]]:
+    code = (f"import sys; import {target}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - started
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return wall, parse_importtime(result.stderr), loaded
+
+
+def measure(target: str, repeat: int) -> Dict[str, object]:
+    walls, cumulative = [], []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        wall, rows, loaded = run_import(target)
+        walls.append(wall)
+        cumulative.append(next(c for _, c, name in rows if name.strip() == target))
+    return {
+        "import_ms": statistics.median(cumulative) / 1000,
+        "wall_ms": statistics.median(walls) * 1000,
+        "loaded": loaded
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of the CLI and state-only entry points")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--targets", nargs="*", default=TARGETS)
+    parser.add_argument("--detail", help="Also list the slowest modules imported by this target")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # Interpreter startup alone, to subtract from the wall times below
+    baseline = statistics.median(run_import("sys")[0] for _ in range(args.repeat)) * 1000
+    print(f"bare interpreter: {baseline:.1f} ms wall")
+    print(f"{'target':<22} {'import ms':>10} {'wall ms':>9}  heavy modules loaded")
+    for target in args.targets:
+        result = measure(target, args.repeat)
+        print(f"{target:<22} {result['import_ms']:10.1f} {result['wall_ms']:9.1f}  "
+              f"{', '.join(result['loaded']) or '-'}")
+
+    if args.detail:
+        _, rows, _ = run_import(args.detail)
+        print(f"\nslowest modules (self time) under {args.detail}:")
+        for self_us, cumulative_us, name in sorted(rows, reverse=True)[:args.top]:
+            print(f"{self_us / 1000:8.2f} ms self {cumulative_us / 1000:8.2f} ms total  {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_llm_client.py
+# Compares the old per-call client setup (load_dotenv + new OpenAI client for every call)
+# against the shared pooled client, using a local keep-alive HTTP server that mimics
+# the chat completions endpoint. Run from the repository root:
+#
+#     python -m benchmarks.bench_llm_client --turns 50
+#
+# Over plain local HTTP this only measures client construction and TCP setup; against the
+# real API each new connection also pays a TLS handshake, so the real savings are larger.
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from src.core import llm
+from src.utils.config import LLMConfig, set_config
+
+CALLS_PER_TURN = 5
+COMPLETION = json.dumps({
+    "id": "bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [{
+        "index": 0,
+        "finish_reason": "stop",
+        "message": {"role": "assistant", "content": json.dumps({"response": "The pet wags its tail."})}
+    }],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+}).encode()
+
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def do_POST(self):
+        self.connections.add(self.client_address)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(COMPLETION)))
+        self.end_headers()
+        self.wfile.write(COMPLETION)
+
+    def log_message(self, *args):
+        pass
+
+
+def _call(client: OpenAI):
+    client.chat.completions.create(
+        model="gpt-4o-mini",
+        response_format={"type": "json_object"},
+        messages=[{"role": "user", "content": "ping"}]
+    )
+
+
+def run_per_call(base_url: str, turns: int):
+    for _ in range(turns * CALLS_PER_TURN):
+        load_dotenv()
+        _call(OpenAI(api_key="bench", base_url=base_url))
+
+
+def run_shared(base_url: str, turns: int):
+    set_config(LLMConfig(api_key="bench", base_url=base_url))
+    llm.reset_client()
+    for _ in range(turns * CALLS_PER_TURN):
+        _call(llm.get_client())
+
+
+def measure(name: str, fn, base_url: str, turns: int):
+    _CompletionHandler.connections.clear()
+    start = time.perf_counter()
+    fn(base_url, turns)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {elapsed / turns * 1000:8.2f} ms/turn, "
+          f"{len(_CompletionHandler.connections) / turns:5.2f} new connections/turn")
+    return elapsed / turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-turn client setup cost, per-call vs shared client")
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CompletionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    try:
+        per_call = measure("per-call", run_per_call, base_url, args.turns)
+        shared = measure("shared", run_shared, base_url, args.turns)
+        print(f"saved: {(per_call - shared) * 1000:.2f} ms/turn ({CALLS_PER_TURN} calls per turn)")
+    finally:
+        server.shutdown()
+        llm.reset_client()
+
+
+if __name__ == "__main__":
+    main()
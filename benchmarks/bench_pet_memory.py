@@ -0,0 +1,167 @@
+# benchmarks/bench_pet_memory.py
+# Bytes per resident pet, and the cost of applying one turn's deltas, for the array-backed states
+# versus the previous layout of one LatentVariable dataclass (with its own __dict__) per variable.
+# The "before" pet is the original Pet with plain memory lists and no MemoryIndex; the "after"
+# pet is the current one, index included, so the whole-pet figure shows everything added since.
+# Run from the repository root:
+#
+#     python -m benchmarks.bench_pet_memory --pets 20000 --memories 10
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from src.core.memory import LongTermMemory, Memory, ShortTermMemory
+from src.core.pet import Pet
+from src.core.states import (
+    LatentVariable, EmotionalState, PhysicalState, PhysicalDescription, EmotionalStateDelta, PhysicalStateDelta,
+    EMOTIONAL_VARIABLES, PHYSICAL_VARIABLES
+)
+from src.core.updaters import apply_emotional_delta, apply_physical_delta
+
+
+# The previous state classes, kept here only for comparison
+@dataclass
+class LegacyLatentVariable:
+    name: str
+    value: float
+
+    def __post_init__(self):
+        self.value = max(-100, min(100, self.value))
+
+
+@dataclass
+class LegacyEmotionalState:
+    variables: List[LegacyLatentVariable]
+
+
+@dataclass
+class LegacyPhysicalState:
+    variables: List[LegacyLatentVariable]
+    description: PhysicalDescription
+
+
+@dataclass
+class LegacyMemory:
+    content: str
+    importance: float
+
+
+@dataclass
+class LegacyShortTermMemory:
+    events: List[LegacyMemory] = field(default_factory=list)
+
+
+@dataclass
+class LegacyLongTermMemory:
+    people: Dict[str, LegacyMemory] = field(default_factory=dict)
+    events: Dict[str, LegacyMemory] = field(default_factory=dict)
+    places: Dict[str, LegacyMemory] = field(default_factory=dict)
+
+
+@dataclass
+class LegacyPet:
+    emotional_state: LegacyEmotionalState
+    physical_state: LegacyPhysicalState
+    long_term_memory: LegacyLongTermMemory
+    short_term_memory: LegacyShortTermMemory
+    name: str
+    age: int
+
+
+def legacy_apply(state, deltas: Dict[str, float]):
+    variables = [LegacyLatentVariable(var.name, var.value + deltas.get(var.name, 0)) for var in state.variables]
+    if isinstance(state, LegacyPhysicalState):
+        return LegacyPhysicalState(variables, state.description)
+    return LegacyEmotionalState(variables)
+
+
+DESCRIPTION = PhysicalDescription(species="dog", color="golden", size="medium", distinctive_features=["floppy ears"])
+
+
+def build_states(count: int, legacy: bool, rng: random.Random):
+    if legacy:
+        return [
+            (LegacyEmotionalState([LegacyLatentVariable(n, rng.uniform(-100, 100)) for n in EMOTIONAL_VARIABLES]),
+             LegacyPhysicalState([LegacyLatentVariable(n, rng.uniform(-100, 100)) for n in PHYSICAL_VARIABLES], DESCRIPTION))
+            for _ in range(count)
+        ]
+    return [
+        (EmotionalState([LatentVariable(n, rng.uniform(-100, 100)) for n in EMOTIONAL_VARIABLES]),
+         PhysicalState([LatentVariable(n, rng.uniform(-100, 100)) for n in PHYSICAL_VARIABLES], DESCRIPTION))
+        for _ in range(count)
+    ]
+
+
+def build_pets(count: int, memories: int, legacy: bool, rng: random.Random):
+    if legacy:
+        pet_class, memory_class = LegacyPet, LegacyMemory
+        long_term_class, short_term_class = LegacyLongTermMemory, LegacyShortTermMemory
+    else:
+        pet_class, memory_class, long_term_class, short_term_class = Pet, Memory, LongTermMemory, ShortTermMemory
+    pets = []
+    for (emotional, physical) in build_states(count, legacy, rng):
+        pets.append(pet_class(
+            emotional_state=emotional,
+            physical_state=physical,
+            long_term_memory=long_term_class(),
+            # Shared text, so only the per-object overhead is measured
+            short_term_memory=short_term_class(
+                events=[memory_class("I played fetch in the park.", rng.random()) for _ in range(memories)]
+            ),
+            name="Buddy",
+            age=3
+        ))
+    return pets
+
+
+def measure(build) -> (float, list):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(objects), objects
+
+
+def time_turn(states, legacy: bool) -> float:
+    emotional_delta = {name: 3 for name in EMOTIONAL_VARIABLES}
+    physical_delta = {name: -2 for name in PHYSICAL_VARIABLES}
+    start = time.perf_counter()
+    if legacy:
+        for emotional, physical in states:
+            legacy_apply(emotional, emotional_delta)
+            legacy_apply(physical, physical_delta)
+    else:
+        emotional_object, physical_object = EmotionalStateDelta(emotional_delta), PhysicalStateDelta(physical_delta)
+        for emotional, physical in states:
+            apply_emotional_delta(emotional, emotional_object)
+            apply_physical_delta(physical, physical_object)
+    return (time.perf_counter() - start) / len(states) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes per pet for the state representations")
+    parser.add_argument("--pets", type=int, default=20_000)
+    parser.add_argument("--memories", type=int, default=10, help="short-term memories per pet")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.pets} pets, {args.memories} short-term memories each")
+    print(f"{'':<10} {'states B/pet':>13} {'pet B/pet':>11} {'turn us/pet':>12}")
+    for legacy in (True, False):
+        rng = random.Random(args.seed)
+        state_bytes, states = measure(lambda: build_states(args.pets, legacy, rng))
+        turn = time_turn(states, legacy)
+        del states
+        pet_bytes, pets = measure(lambda: build_pets(args.pets, args.memories, legacy, rng))
+        del pets
+        print(f"{'before' if legacy else 'after':<10} {state_bytes:13.0f} {pet_bytes:11.0f} {turn:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_state_batch.py
+# Applies one emotional and one physical delta to every pet, per-object vs PetStateBatch.
+# Run from the repository root:
+#
+#     python -m benchmarks.bench_state_batch --sizes 10000 1000000
+import argparse
+import time
+
+import numpy as np
+
+from src.core.batch import PetStateBatch
+from src.core.states import (
+    LatentVariable, EmotionalState, PhysicalState, PhysicalDescription, EmotionalStateDelta, PhysicalStateDelta,
+    EMOTIONAL_VARIABLES, PHYSICAL_VARIABLES
+)
+from src.core.updaters import apply_emotional_delta, apply_physical_delta
+
+DESCRIPTION = PhysicalDescription(species="dog", color="golden", size="medium", distinctive_features=[])
+
+
+def build_states(size: int, rng: np.random.Generator):
+    emotional = rng.uniform(-100, 100, (size, len(EMOTIONAL_VARIABLES)))
+    physical = rng.uniform(-100, 100, (size, len(PHYSICAL_VARIABLES)))
+    states = [
+        (
+            EmotionalState([LatentVariable(name, value) for name, value in zip(EMOTIONAL_VARIABLES, e)]),
+            PhysicalState([LatentVariable(name, value) for name, value in zip(PHYSICAL_VARIABLES, p)], DESCRIPTION)
+        )
+        for e, p in zip(emotional.tolist(), physical.tolist())
+    ]
+    return states, emotional, physical
+
+
+def bench(size: int, rng: np.random.Generator):
+    states, emotional, physical = build_states(size, rng)
+    emotional_deltas = rng.uniform(-10, 10, (size, len(EMOTIONAL_VARIABLES)))
+    physical_deltas = rng.uniform(-10, 10, (size, len(PHYSICAL_VARIABLES)))
+    emotional_objects = [EmotionalStateDelta(dict(zip(EMOTIONAL_VARIABLES, row))) for row in emotional_deltas.tolist()]
+    physical_objects = [PhysicalStateDelta(dict(zip(PHYSICAL_VARIABLES, row))) for row in physical_deltas.tolist()]
+
+    start = time.perf_counter()
+    updated = [
+        (apply_emotional_delta(e, ed), apply_physical_delta(p, pd))
+        for (e, p), ed, pd in zip(states, emotional_objects, physical_objects)
+    ]
+    per_object = time.perf_counter() - start
+
+    batch = PetStateBatch(emotional, physical, [DESCRIPTION] * size)
+    start = time.perf_counter()
+    batch.apply_emotional_deltas(emotional_deltas)
+    batch.apply_physical_deltas(physical_deltas)
+    vectorized = time.perf_counter() - start
+
+    # Both paths must agree
+    for i in (0, size // 2, size - 1):
+        assert np.allclose(batch.emotional[i], [v.value for v in updated[i][0].variables])
+        assert np.allclose(batch.physical[i], [v.value for v in updated[i][1].variables])
+
+    print(f"{size:>9} pets: per-object {per_object * 1000:10.1f} ms, batch {vectorized * 1000:8.2f} ms, "
+          f"speedup {per_object / vectorized:8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-object vs vectorized delta application")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    for size in args.sizes:
+        bench(size, rng)
+
+
+if __name__ == "__main__":
+    main()
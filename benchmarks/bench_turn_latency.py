@@ -0,0 +1,94 @@
+# benchmarks/bench_turn_latency.py
+# End-to-end turn latency against the deterministic stub backend, so results do not depend on
+# network or provider variance. Each session plays its own game on its own thread.
+# Run from the repository root:
+#
+#     python -m benchmarks.bench_turn_latency --concurrency 1 4 16 64 --latency 0.05
+#     python -m benchmarks.bench_turn_latency --fused --no-cache
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from main import create_initial_pet
+from src.core.backends import StubBackend
+from src.core.cache import DeltaCache, set_delta_cache
+from src.core.llm import set_backend
+from src.game.game import Game
+from src.game.scenario import generate_dynamic_scenario
+
+MESSAGES = [
+    "I throw a ball across the yard",
+    "1",
+    "I give the pet a belly rub",
+    "2",
+    "I take the pet for a walk in the rain",
+    "I fill the food bowl",
+]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def play_session(index: int, turns: int, fused: bool, start: threading.Barrier) -> List[float]:
+    pet = create_initial_pet()
+    pet.fused_analysis = fused
+    game = Game(pet, generate_dynamic_scenario(pet, None, None, None))
+    start.wait()
+    latencies = []
+    for turn in range(turns):
+        # Offset by session so concurrent sessions do not send identical interactions in lockstep
+        message = MESSAGES[(index + turn) % len(MESSAGES)]
+        began = time.perf_counter()
+        game.process_message(message)
+        latencies.append(time.perf_counter() - began)
+    return latencies
+
+
+def bench(concurrency: int, turns: int, fused: bool, backend: StubBackend):
+    start = threading.Barrier(concurrency + 1)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(play_session, i, turns, fused, start) for i in range(concurrency)]
+        # Session setup (including the first scenario) is excluded from the measurement
+        start.wait()
+        backend.reset_counters()
+        began = time.perf_counter()
+        latencies = [latency for future in futures for latency in future.result()]
+        elapsed = time.perf_counter() - began
+
+    calls = backend.call_count / len(latencies)
+    print(f"{concurrency:>5} sessions: p50 {percentile(latencies, 0.50) * 1000:8.1f} ms, "
+          f"p95 {percentile(latencies, 0.95) * 1000:8.1f} ms, p99 {percentile(latencies, 0.99) * 1000:8.1f} ms, "
+          f"mean {statistics.mean(latencies) * 1000:8.1f} ms, {calls:4.1f} calls/turn, "
+          f"{len(latencies) / elapsed:8.1f} turns/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turn latency percentiles with the stub LLM backend")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--turns", type=int, default=10, help="turns per session")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per LLM call")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fused", action="store_true", help="use the single fused analysis call")
+    parser.add_argument("--no-cache", action="store_true", help="disable the delta cache")
+    args = parser.parse_args()
+
+    backend = StubBackend(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate, seed=args.seed)
+    set_backend(backend)
+    if args.no_cache:
+        set_delta_cache(DeltaCache(max_entries=0))
+
+    print(f"stub latency {args.latency * 1000:.0f} ms +/- {args.jitter * 1000:.0f} ms, "
+          f"{'fused' if args.fused else 'split'} analysis, cache {'off' if args.no_cache else 'on'}")
+    for concurrency in args.concurrency:
+        bench(concurrency, args.turns, args.fused, backend)
+
+
+if __name__ == "__main__":
+    main()
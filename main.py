@@ -3,6 +3,7 @@ from src.core.states import EmotionalState, PhysicalState, PhysicalDescription,
 from src.core.memory import LongTermMemory, ShortTermMemory
 from src.game.game import Game
 from src.game.scenario import generate_dynamic_scenario
+from src.utils.formatters import format_pet_state
 
 
 def create_initial_pet():
@@ -36,13 +37,46 @@ def create_initial_pet():
         age=3
     )
 
+def play_turn(game: Game, user_input: str):
+    # Prints the pet response and the next scenario as they stream in
+    streaming = None
+    for event in game.process_message_stream(user_input):
+        if event["type"] == "pet_response":
+            if streaming is None:
+                print("Pet's response: ", end="")
+            streaming = "pet_response"
+            print(event["text"], end="", flush=True)
+        elif event["type"] == "scenario":
+            if streaming != "scenario":
+                print()
+                print(format_pet_state(game.pet))
+            streaming = "scenario"
+            print(event["text"], end="", flush=True)
+        elif event["type"] == "result":
+            result = event["result"]
+            if 'special_action' in result:
+                print(result['content'])
+                print(game.current_scenario.description)
+                return
+            if streaming is None:
+                # Nothing streamed, e.g. a prefetched turn: print everything at once
+                print(f"Pet's response: {result['pet_response']}")
+                print(result["pet_state"])
+            elif streaming == "pet_response":
+                print()
+                print(result["pet_state"])
+            if streaming != "scenario":
+                print(result["scenario"])
+            else:
+                print()
+
 def main():
     pet = create_initial_pet()
     initial_scenario = generate_dynamic_scenario(pet, None, None, None)
     game = Game(pet, initial_scenario)
+    print(game.current_scenario.description)
 
     while True:
-        print(game.current_scenario.description)
         for i, choice in enumerate(game.current_scenario.choices, 1):
             print(f"{i}. {choice.text}")
         print(f"{len(game.current_scenario.choices) + 1}. [Freeform Action]")
@@ -55,13 +89,7 @@ def main():
         if user_input.lower() == 'quit':
             break
 
-        result = game.process_message(user_input)
-        
-        if 'special_action' in result:
-            print(result['content'])
-        else:
-            print(f"Pet's response: {result['pet_response']}")
-            print(result["pet_state"])
+        play_turn(game, user_input)
 
 
 if __name__ == "__main__":
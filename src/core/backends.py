@@ -0,0 +1,173 @@
+# src\core\backends.py
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from .states import EMOTIONAL_VARIABLES, PHYSICAL_VARIABLES
+
+
+@dataclass
+class CompletionRequest:
+    # task names the call site (emotional_delta, physical_delta, their *_batch variants, memory, response,
+    # analysis, scenario)
+    task: str
+    system_message: str
+    user_message: str
+    model: str
+    response_format: dict = field(default_factory=lambda: {"type": "json_object"})
+    options: dict = field(default_factory=dict)
+    # Seconds this attempt may take; backends raise TimeoutError past it
+    timeout: Optional[float] = None
+
+
+@dataclass
+class Completion:
+    content: str
+    finish_reason: str = "stop"
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
+class LLMBackend:
+    def complete(self, request: CompletionRequest) -> Completion:
+        raise NotImplementedError
+
+    def stream(self, request: CompletionRequest) -> Iterator[str]:
+        # Backends without native streaming hand back the whole completion as one chunk
+        yield self.complete(request).content
+
+
+class StubBackendError(Exception):
+    # Stands in for a provider-side failure, so it is retried and counted by the circuit breaker
+    status_code = 503
+
+
+_MOODS = ["happily", "curiously", "lazily", "eagerly", "calmly", "playfully"]
+_ACTIONS = ["wags its tail", "tilts its head", "rolls over", "sniffs around", "stretches", "nuzzles your hand"]
+_SCENARIO_CHOICES = [
+    ("Feed your pet", "feed_pet"),
+    ("Play with your pet", "play_with_pet"),
+    ("Let your pet nap", "let_pet_nap"),
+    ("Groom your pet", "groom_pet"),
+    ("Ignore your pet", "ignore_pet"),
+]
+
+
+class StubBackend(LLMBackend):
+    # Offline stand-in for the model. Output depends only on (seed, task, prompt), so runs are
+    # reproducible; latency, jitter and failures are simulated separately and do not affect it.
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0,
+                 seed: int = 0, stream_chunk_size: int = 8, time_to_first_token: Optional[float] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.stream_chunk_size = stream_chunk_size
+        self.time_to_first_token = latency / 4 if time_to_first_token is None else time_to_first_token
+        self.calls: Counter = Counter()
+        self.failures: Counter = Counter()
+        self._timing = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def call_count(self) -> int:
+        return sum(self.calls.values())
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls.clear()
+            self.failures.clear()
+
+    def _begin(self, request: CompletionRequest) -> float:
+        with self._lock:
+            self.calls[request.task] += 1
+            delay = max(0.0, self.latency + self._timing.uniform(-self.jitter, self.jitter))
+            failed = self._timing.random() < self.failure_rate
+            if failed:
+                self.failures[request.task] += 1
+        if request.timeout is not None and delay > request.timeout:
+            time.sleep(request.timeout)
+            raise TimeoutError(f"Stub call for {request.task} timed out after {request.timeout}s")
+        if failed:
+            time.sleep(delay)
+            raise StubBackendError(f"Injected failure for {request.task}")
+        return delay
+
+    def _rng(self, request: CompletionRequest) -> random.Random:
+        digest = hashlib.sha256(
+            f"{self.seed}|{request.task}|{request.system_message}|{request.user_message}".encode("utf-8")
+        ).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _content(self, request: CompletionRequest) -> dict:
+        rng = self._rng(request)
+        task = request.task
+
+        def deltas(keys):
+            return {key: rng.randint(-10, 10) for key in keys}
+
+        def reaction():
+            return f"The pet {rng.choice(_ACTIONS)} {rng.choice(_MOODS)}."
+
+        def memory():
+            return f"I remember that I {rng.choice(_ACTIONS).replace('its', 'my').replace('your', 'a')} {rng.choice(_MOODS)}."
+
+        if task == "emotional_delta":
+            return deltas(EMOTIONAL_VARIABLES)
+        if task == "physical_delta":
+            return deltas(PHYSICAL_VARIABLES)
+        if task == "memory":
+            return {"memory": memory(), "importance": round(rng.random(), 2)}
+        if task == "response":
+            return {"response": reaction()}
+        if task in ("emotional_delta_batch", "physical_delta_batch"):
+            # Each item's deltas depend only on its own text, not on what it was batched with
+            keys = EMOTIONAL_VARIABLES if task.startswith("emotional") else PHYSICAL_VARIABLES
+            results = []
+            for item in json.loads(request.user_message)["interactions"]:
+                digest = hashlib.sha256(f"{self.seed}|{task}|{item['text']}".encode("utf-8")).digest()
+                item_rng = random.Random(int.from_bytes(digest[:8], "big"))
+                results.append({"id": item["id"], "changes": {key: item_rng.randint(-10, 10) for key in keys}})
+            return {"results": results}
+        if task == "analysis":
+            return {
+                "emotional_changes": deltas(EMOTIONAL_VARIABLES),
+                "physical_changes": deltas(PHYSICAL_VARIABLES),
+                "memory": memory(),
+                "importance": round(rng.random(), 2),
+                "response": reaction()
+            }
+        if task == "scenario":
+            choices = rng.sample(_SCENARIO_CHOICES, 2)
+            return {
+                "description": f"Your pet looks up at you {rng.choice(_MOODS)}. What will you do?",
+                "choices": [{"text": text, "action": action} for text, action in choices]
+            }
+        return {}
+
+    def complete(self, request: CompletionRequest) -> Completion:
+        delay = self._begin(request)
+        content = json.dumps(self._content(request))
+        time.sleep(delay)
+        return Completion(
+            content=content,
+            prompt_tokens=(len(request.system_message) + len(request.user_message)) // 4,
+            completion_tokens=len(content) // 4
+        )
+
+    def stream(self, request: CompletionRequest) -> Iterator[str]:
+        delay = self._begin(request)
+        content = json.dumps(self._content(request))
+        chunks = [content[i:i + self.stream_chunk_size] for i in range(0, len(content), self.stream_chunk_size)]
+        time.sleep(min(delay, self.time_to_first_token))
+        per_chunk = max(0.0, delay - self.time_to_first_token) / max(1, len(chunks))
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(per_chunk)
+            yield chunk
@@ -0,0 +1,121 @@
+# src\core\batch.py
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .states import (
+    EmotionalState, PhysicalState, PhysicalDescription, EmotionalStateDelta, PhysicalStateDelta,
+    EMOTIONAL_VARIABLES, PHYSICAL_VARIABLES
+)
+
+STATE_MIN = -100.0
+STATE_MAX = 100.0
+
+# Same column layout as the states' own value arrays, so rows copy across without lookups
+EMOTIONAL_INDEX = EmotionalState.INDEX
+PHYSICAL_INDEX = PhysicalState.INDEX
+
+
+def _delta_vector(variable_deltas: dict, index: dict) -> np.ndarray:
+    vector = np.zeros(len(index))
+    for name, value in variable_deltas.items():
+        if name in index:
+            vector[index[name]] = value
+    return vector
+
+
+class PetStateBatch:
+    # Emotional and physical variables of many pets as two contiguous (N, 5) and (N, 4) float arrays,
+    # columns in EMOTIONAL_VARIABLES / PHYSICAL_VARIABLES order. Deltas are applied in place with the
+    # same clamping to [-100, 100] as LatentVariable.
+
+    def __init__(self, emotional: np.ndarray, physical: np.ndarray,
+                 descriptions: Optional[List[PhysicalDescription]] = None):
+        emotional = np.ascontiguousarray(emotional, dtype=np.float64)
+        physical = np.ascontiguousarray(physical, dtype=np.float64)
+        if emotional.ndim != 2 or emotional.shape[1] != len(EMOTIONAL_VARIABLES):
+            raise ValueError(f"Emotional array must have shape (N, {len(EMOTIONAL_VARIABLES)})")
+        if physical.shape != (emotional.shape[0], len(PHYSICAL_VARIABLES)):
+            raise ValueError(f"Physical array must have shape ({emotional.shape[0]}, {len(PHYSICAL_VARIABLES)})")
+        if descriptions is not None and len(descriptions) != emotional.shape[0]:
+            raise ValueError("Need one physical description per pet")
+        self.emotional = np.clip(emotional, STATE_MIN, STATE_MAX)
+        self.physical = np.clip(physical, STATE_MIN, STATE_MAX)
+        self.descriptions = descriptions
+
+    @classmethod
+    def filled(cls, size: int, value: float = 50.0,
+               descriptions: Optional[List[PhysicalDescription]] = None) -> "PetStateBatch":
+        return cls(
+            np.full((size, len(EMOTIONAL_VARIABLES)), value),
+            np.full((size, len(PHYSICAL_VARIABLES)), value),
+            descriptions
+        )
+
+    @classmethod
+    def from_states(cls, states: Iterable[Tuple[EmotionalState, PhysicalState]]) -> "PetStateBatch":
+        emotional_rows, physical_rows, descriptions = [], [], []
+        for emotional_state, physical_state in states:
+            emotional_rows.append(emotional_state.values.tobytes())
+            physical_rows.append(physical_state.values.tobytes())
+            descriptions.append(physical_state.description)
+        return cls(
+            np.frombuffer(b"".join(emotional_rows), dtype=np.float64).reshape(-1, len(EMOTIONAL_VARIABLES)),
+            np.frombuffer(b"".join(physical_rows), dtype=np.float64).reshape(-1, len(PHYSICAL_VARIABLES)),
+            descriptions
+        )
+
+    @classmethod
+    def from_pets(cls, pets: Iterable["Pet"]) -> "PetStateBatch":
+        return cls.from_states((pet.emotional_state, pet.physical_state) for pet in pets)
+
+    def __len__(self) -> int:
+        return self.emotional.shape[0]
+
+    def apply_emotional_deltas(self, deltas: np.ndarray, rows: Optional[np.ndarray] = None):
+        self._apply(self.emotional, deltas, rows)
+
+    def apply_physical_deltas(self, deltas: np.ndarray, rows: Optional[np.ndarray] = None):
+        self._apply(self.physical, deltas, rows)
+
+    @staticmethod
+    def _apply(values: np.ndarray, deltas: np.ndarray, rows: Optional[np.ndarray]):
+        # deltas is (N, k), or (len(rows), k) when rows selects pets, or a single (k,) row for everyone
+        if rows is None:
+            values += deltas
+            np.clip(values, STATE_MIN, STATE_MAX, out=values)
+        else:
+            # add.at accumulates correctly when a pet appears in rows more than once
+            np.add.at(values, rows, deltas)
+            values[rows] = np.clip(values[rows], STATE_MIN, STATE_MAX)
+
+    @staticmethod
+    def emotional_delta_vector(delta: EmotionalStateDelta) -> np.ndarray:
+        return _delta_vector(delta.variable_deltas, EMOTIONAL_INDEX)
+
+    @staticmethod
+    def physical_delta_vector(delta: PhysicalStateDelta) -> np.ndarray:
+        return _delta_vector(delta.variable_deltas, PHYSICAL_INDEX)
+
+    def emotional_state(self, i: int) -> EmotionalState:
+        return EmotionalState.from_values(self.emotional[i].tolist())
+
+    def physical_state(self, i: int, description: Optional[PhysicalDescription] = None) -> PhysicalState:
+        if description is None:
+            if self.descriptions is None:
+                raise ValueError("This batch was built without physical descriptions")
+            description = self.descriptions[i]
+        return PhysicalState.from_values(self.physical[i].tolist(), description)
+
+    def set_states(self, i: int, emotional_state: EmotionalState, physical_state: PhysicalState):
+        self.emotional[i] = emotional_state.values
+        self.physical[i] = physical_state.values
+        if self.descriptions is not None:
+            self.descriptions[i] = physical_state.description
+
+    def write_back(self, pets: Sequence["Pet"]):
+        # Copies the batch values back onto the Pet objects it was built from, in the same order
+        for i, pet in enumerate(pets):
+            pet.emotional_state = self.emotional_state(i)
+            pet.physical_state = self.physical_state(i, pet.physical_state.description)
+            pet.touch()
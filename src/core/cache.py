@@ -0,0 +1,155 @@
+# src\core\cache.py
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from src.utils.config import get_config
+
+if TYPE_CHECKING:
+    import sqlite3
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def normalize_interaction(interaction: str) -> str:
+    return " ".join(interaction.lower().split())
+
+
+def make_delta_key(kind: str, interaction: str, model: str, prompt_version: int) -> str:
+    raw = f"{kind}|{model}|v{prompt_version}|{normalize_interaction(interaction)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DeltaCache:
+    # In-process LRU in front of an optional SQLite tier that survives restarts.
+    # Both tiers expire entries after `ttl` seconds and hold at most their configured number of entries.
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400.0,
+                 sqlite_path: Optional[str] = None, max_disk_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional['sqlite3.Connection'] = None
+        self._disk_writes = 0
+        if sqlite_path:
+            import sqlite3  # only loaded when the disk tier is in use
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS delta_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS delta_cache_expiry ON delta_cache (expires_at)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return dict(value)
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM delta_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._store_memory(key, value, row[1])
+                    self.stats.hits += 1
+                    self.stats.disk_hits += 1
+                    return dict(value)
+
+            self.stats.misses += 1
+            return None
+
+    def set(self, key: str, value: dict):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store_memory(key, dict(value), expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO delta_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at)
+                )
+                self._disk_writes += 1
+                if self._disk_writes % 256 == 0:
+                    self._prune_disk()
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM delta_cache")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store_memory(self, key: str, value: dict, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _prune_disk(self):
+        self._db.execute("DELETE FROM delta_cache WHERE expires_at <= ?", (time.time(),))
+        # Entries expiring soonest are the oldest writes, so they go first once over budget
+        self._db.execute(
+            "DELETE FROM delta_cache WHERE key IN ("
+            "SELECT key FROM delta_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+
+
+_delta_cache: Optional[DeltaCache] = None
+_delta_cache_lock = threading.Lock()
+
+
+def get_delta_cache() -> DeltaCache:
+    global _delta_cache
+    if _delta_cache is None:
+        with _delta_cache_lock:
+            if _delta_cache is None:
+                config = get_config()
+                _delta_cache = DeltaCache(
+                    max_entries=config.delta_cache_size,
+                    ttl=config.delta_cache_ttl,
+                    sqlite_path=config.delta_cache_path
+                )
+    return _delta_cache
+
+
+def set_delta_cache(cache: Optional[DeltaCache]):
+    global _delta_cache
+    with _delta_cache_lock:
+        _delta_cache = cache
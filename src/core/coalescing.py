@@ -0,0 +1,114 @@
+# src\core\coalescing.py
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar, Union
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight:
+    # Callers asking for the same key while a call for it is in flight wait for that call and share
+    # its result (or its exception) instead of making their own. Nothing is kept once it finishes.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], V]) -> Tuple[V, bool]:
+        # Returns (result, shared), where shared is True for callers that joined another's call
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class _Batch:
+    __slots__ = ("items",)
+
+    def __init__(self):
+        self.items: Dict[Hashable, Future] = {}
+
+
+class MicroBatcher(Generic[K, V]):
+    # Packs items submitted within max_wait seconds of the first one into a single run_batch call of
+    # at most max_batch_size items. There is no background thread: the caller that opens a batch
+    # waits for it to fill or time out and then runs it, while the others wait for their share.
+    # Equal items submitted to the same batch occupy one slot and get the same result.
+    #
+    # run_batch receives the distinct items in submission order and returns one entry per item;
+    # an Exception entry fails only that item's callers, a raised exception fails the whole batch.
+
+    def __init__(self, run_batch: Callable[[List[K]], List[Union[V, Exception]]],
+                 max_batch_size: int = 8, max_wait: float = 0.02):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._open: Optional[_Batch] = None
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item: K) -> V:
+        with self._cond:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            future = batch.items.get(item)
+            if future is None:
+                future = batch.items[item] = Future()
+                if len(batch.items) >= self.max_batch_size:
+                    self._open = None
+                    self._cond.notify_all()
+            if leader:
+                deadline = time.monotonic() + self.max_wait
+                while self._open is batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._open = None
+                        break
+                    self._cond.wait(remaining)
+        if leader:
+            self._execute(batch)
+        return future.result()
+
+    def _execute(self, batch: _Batch):
+        items = list(batch.items)
+        with self._cond:
+            self.batches += 1
+            self.items += len(items)
+        try:
+            results = self.run_batch(items)
+            if len(results) != len(items):
+                raise ValueError(f"Batch returned {len(results)} results for {len(items)} items")
+        except BaseException as e:
+            for future in batch.items.values():
+                future.set_exception(e)
+            return
+        for item, result in zip(items, results):
+            if isinstance(result, Exception):
+                batch.items[item].set_exception(result)
+            else:
+                batch.items[item].set_result(result)
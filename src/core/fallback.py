@@ -0,0 +1,58 @@
+# src\core\fallback.py
+import re
+from typing import Dict, Tuple
+
+from .states import EmotionalStateDelta, PhysicalStateDelta, EMOTIONAL_VARIABLES, PHYSICAL_VARIABLES
+
+# Local stand-in for the delta prompts, used when the LLM is unavailable. Each rule lists word
+# prefixes and the changes they suggest; every rule that matches contributes once.
+FALLBACK_RULES: Tuple[Tuple[Tuple[str, ...], Dict[str, int]], ...] = (
+    (("feed", "food", "treat", "eat", "snack", "meal", "bowl", "dinner", "breakfast"),
+     {"hunger": -8, "happiness": 4, "affection": 2}),
+    (("drink", "water"),
+     {"hunger": -2, "health": 1}),
+    (("play", "ball", "fetch", "toy", "game", "chase", "throw", "frisbee", "tug"),
+     {"excitement": 6, "happiness": 4, "tiredness": 4, "calmness": -2}),
+    (("nap", "sleep", "rest", "bed", "lie", "relax", "quiet"),
+     {"tiredness": -8, "calmness": 5, "excitement": -3}),
+    (("groom", "brush", "bath", "wash", "clean", "comb", "shampoo"),
+     {"cleanliness": 8, "calmness": 2}),
+    (("pet", "cuddle", "hug", "stroke", "scratch", "rub", "snuggle", "praise", "love", "kiss"),
+     {"affection": 6, "happiness": 3, "calmness": 3}),
+    (("walk", "run", "explore", "outside", "park", "hike", "garden", "yard"),
+     {"curiosity": 5, "excitement": 3, "tiredness": 3, "health": 2}),
+    (("new", "strange", "mystery", "sniff", "discover", "smell", "puzzle", "hide"),
+     {"curiosity": 6, "excitement": 2}),
+    (("vet", "medicine", "heal", "bandage", "vitamin"),
+     {"health": 6, "calmness": -2}),
+    (("mud", "dirt", "puddle", "rain", "dig"),
+     {"cleanliness": -6, "excitement": 3}),
+    (("ignore", "leave", "alone", "away", "busy"),
+     {"affection": -5, "happiness": -4, "calmness": -1}),
+    (("scold", "yell", "shout", "hit", "punish", "angry", "kick"),
+     {"happiness": -6, "calmness": -5, "affection": -4}),
+    (("loud", "thunder", "storm", "firework", "scare"),
+     {"calmness": -6, "excitement": 3}),
+)
+
+_WORD = re.compile(r"[a-z]+")
+
+
+def _fallback_deltas(interaction: str) -> Dict[str, int]:
+    words = _WORD.findall(interaction.lower())
+    totals: Dict[str, int] = {}
+    for prefixes, changes in FALLBACK_RULES:
+        if any(word.startswith(prefixes) for word in words):
+            for key, value in changes.items():
+                totals[key] = totals.get(key, 0) + value
+    return {key: max(-10, min(10, value)) for key, value in totals.items()}
+
+
+def fallback_emotional_delta(interaction: str) -> EmotionalStateDelta:
+    deltas = _fallback_deltas(interaction)
+    return EmotionalStateDelta(variable_deltas={key: deltas.get(key, 0) for key in EMOTIONAL_VARIABLES})
+
+
+def fallback_physical_delta(interaction: str) -> PhysicalStateDelta:
+    deltas = _fallback_deltas(interaction)
+    return PhysicalStateDelta(variable_deltas={key: deltas.get(key, 0) for key in PHYSICAL_VARIABLES})
@@ -0,0 +1,256 @@
+# src\core\llm.py
+import json
+import threading
+import time
+from dataclasses import replace
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Tuple, TypeVar
+
+from src.utils.config import LLMConfig, get_config
+from src.utils.tracing import get_tracer
+from .backends import Completion, CompletionRequest, LLMBackend, StubBackend
+from .coalescing import SingleFlight
+from .prompts import compact_lines, estimate_tokens, record_prompt_tokens
+from .resilience import CircuitOpenError, backoff_delay, get_circuit_breaker, is_retryable, is_upstream_error
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+_client: Optional['OpenAI'] = None
+_client_config: Optional[LLMConfig] = None
+_client_lock = threading.Lock()
+
+
+def _build_client(config: LLMConfig) -> 'OpenAI':
+    # Imported here so that code which never talks to the API (state math, formatters, the stub
+    # backend, offline tools) does not pay for loading the SDK
+    import httpx
+    from openai import OpenAI
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(config.read_timeout, connect=config.connect_timeout),
+    )
+    # Retries are handled in _with_retries, together with the deadline and circuit breaker
+    return OpenAI(api_key=config.api_key, base_url=config.base_url, http_client=http_client, max_retries=0)
+
+
+def get_client() -> 'OpenAI':
+    # One pooled, keep-alive client per process. OpenAI clients are safe to share between threads,
+    # so updaters running concurrently all reuse the same connections.
+    global _client, _client_config
+    config = get_config()
+    if _client is None or _client_config is not config:
+        with _client_lock:
+            if _client is None or _client_config is not config:
+                if _client is not None:
+                    _client.close()
+                _client = _build_client(config)
+                _client_config = config
+    return _client
+
+
+def reset_client():
+    global _client, _client_config
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _client_config = None
+
+
+class OpenAIBackend(LLMBackend):
+    # Sends requests through the shared pooled client
+
+    def complete(self, request: CompletionRequest) -> Completion:
+        response = get_client().chat.completions.create(**self._arguments(request))
+        usage = getattr(response, "usage", None)
+        return Completion(
+            content=response.choices[0].message.content,
+            finish_reason=response.choices[0].finish_reason,
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None)
+        )
+
+    def stream(self, request: CompletionRequest) -> Iterator[str]:
+        for chunk in get_client().chat.completions.create(stream=True, **self._arguments(request)):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    @staticmethod
+    def _arguments(request: CompletionRequest) -> dict:
+        arguments = dict(
+            model=request.model,
+            response_format=request.response_format,
+            messages=[
+                {"role": "system", "content": request.system_message},
+                {"role": "user", "content": request.user_message}
+            ],
+            **request.options
+        )
+        if request.timeout is not None:
+            arguments["timeout"] = request.timeout
+        return arguments
+
+
+_backend: Optional[LLMBackend] = None
+_backend_lock = threading.Lock()
+
+
+def _default_backend(config: LLMConfig) -> LLMBackend:
+    if config.backend == "stub":
+        return StubBackend(latency=config.stub_latency, jitter=config.stub_jitter,
+                           failure_rate=config.stub_failure_rate, seed=config.stub_seed)
+    if config.backend == "openai":
+        return OpenAIBackend()
+    raise ValueError(f"Unknown LLM backend: {config.backend}")
+
+
+def get_backend() -> LLMBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _default_backend(get_config())
+    return _backend
+
+
+def set_backend(backend: Optional[LLMBackend]):
+    # None restores the backend selected by configuration
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def _request(system_message: str, user_message: str, response_format: Optional[dict], task: str,
+             options: dict) -> CompletionRequest:
+    system_message = compact_lines(system_message)
+    record_prompt_tokens(task, system_message, user_message)
+    return CompletionRequest(
+        task=task,
+        system_message=system_message,
+        user_message=user_message,
+        model=get_config().model,
+        response_format=response_format or {"type": "json_object"},
+        options=options
+    )
+
+
+T = TypeVar("T")
+
+
+def _with_retries(request: CompletionRequest, attempt: Callable[[CompletionRequest], T], span) -> T:
+    # Bounded, jittered retries inside an overall deadline. While the shared breaker is open the
+    # call fails immediately with CircuitOpenError instead of waiting on a failing upstream.
+    config = get_config()
+    breaker = get_circuit_breaker()
+    deadline = time.monotonic() + config.call_deadline
+    for attempt_number in range(config.max_retries + 1):
+        # Deadline first: once allow() has let a half-open probe through, the attempt must record an outcome
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Deadline for {request.task} exceeded after {attempt_number} attempts")
+        if not breaker.allow():
+            span.set(breaker_open=True)
+            raise CircuitOpenError(f"LLM circuit is open; not calling {request.task}")
+        span.set(attempts=attempt_number + 1)
+        try:
+            result = attempt(replace(request, timeout=min(config.call_timeout, remaining)))
+        except Exception as e:
+            if not is_upstream_error(e):
+                # A local failure says nothing about the upstream's health
+                breaker.release()
+                raise
+            if not is_retryable(e):
+                # The upstream answered, it just rejected this request
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            delay = backoff_delay(attempt_number, config.retry_base_delay, config.retry_max_delay)
+            if attempt_number == config.max_retries or time.monotonic() + delay >= deadline:
+                raise
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+
+# Shared by every session in the process; see create_json_completion
+_single_flight = SingleFlight()
+
+
+def _flight_key(request: CompletionRequest) -> tuple:
+    return (
+        request.task,
+        request.model,
+        request.system_message,
+        request.user_message,
+        json.dumps(request.response_format, sort_keys=True),
+        json.dumps(request.options, sort_keys=True, default=str)
+    )
+
+
+def create_json_completion(system_message: str, user_message: str, response_format: Optional[dict] = None,
+                           task: str = "chat", **options) -> Completion:
+    # With single_flight on, a request identical to one already in flight waits for that call and
+    # gets the same completion. Streams are never shared, since each caller consumes its own.
+    request = _request(system_message, user_message, response_format, task, options)
+    with get_tracer().span(f"llm.{task}", model=request.model) as span:
+        call = lambda: _with_retries(request, get_backend().complete, span)
+        if get_config().single_flight:
+            completion, shared = _single_flight.do(_flight_key(request), call)
+        else:
+            completion, shared = call(), False
+        if shared:
+            # No tokens were spent on this caller's behalf
+            span.set(shared=True, finish_reason=completion.finish_reason)
+        else:
+            span.set(
+                prompt_tokens=completion.prompt_tokens or estimate_tokens(request.system_message + request.user_message),
+                completion_tokens=completion.completion_tokens or estimate_tokens(completion.content or ""),
+                finish_reason=completion.finish_reason
+            )
+    return completion
+
+
+def _open_stream(request: CompletionRequest) -> Tuple[Optional[str], Iterator[str]]:
+    # Waits for the first chunk, so a stream that fails before producing anything can be retried
+    stream = iter(get_backend().stream(request))
+    return next(stream, None), stream
+
+
+def stream_json_completion(system_message: str, user_message: str, response_format: Optional[dict] = None,
+                           task: str = "chat", **options) -> Iterator[str]:
+    # Yields the raw JSON text of the completion as it is generated
+    request = _request(system_message, user_message, response_format, task, options)
+    return _stream(get_tracer(), request)
+
+
+def _stream(tracer, request: CompletionRequest) -> Iterator[str]:
+    # The span stays open until the stream is exhausted but is not made current, since the
+    # caller's own spans run in between chunks
+    with tracer.span(f"llm.{request.task}", activate=False, model=request.model, streaming=True) as span:
+        started = time.perf_counter()
+        first, stream = _with_retries(request, _open_stream, span)
+        if first is None:
+            return
+        span.set(time_to_first_chunk=time.perf_counter() - started)
+        pieces = [first]
+        yield first
+        try:
+            for chunk in stream:
+                pieces.append(chunk)
+                yield chunk
+        except Exception as e:
+            # Chunks were already handed out, so a failure mid-stream cannot be retried
+            if is_retryable(e):
+                get_circuit_breaker().record_failure()
+            raise
+        span.set(
+            prompt_tokens=estimate_tokens(request.system_message + request.user_message),
+            completion_tokens=estimate_tokens("".join(pieces)),
+            chunks=len(pieces)
+        )
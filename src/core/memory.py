@@ -1,29 +1,101 @@
 # src\core\memory.py
+import heapq
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Deque, Dict, List, Optional, Tuple
+
+MEMORY_CATEGORIES = ('people', 'events', 'places')
 
 @dataclass
 class Memory:
+    __slots__ = ("content", "importance")
     content: str
     importance: float
 
 @dataclass
 class ShortTermMemory:
-    events: List[Memory] = field(default_factory=list)
+    events: Deque[Memory] = field(default_factory=deque)
+    capacity: int = 10
+
+    def __post_init__(self):
+        if self.capacity < 1:
+            raise ValueError("Short-term memory capacity must be at least 1")
+        # Fixed-size ring buffer: appending to a full buffer drops the oldest memory in O(1)
+        self.events = deque(self.events, maxlen=self.capacity)
 
-    def add_memory(self, memory: Memory):
+    def add_memory(self, memory: Memory) -> Optional[Memory]:
+        # Returns the memory pushed out of the buffer, if any, so it can be consolidated
+        evicted = self.events[0] if len(self.events) == self.capacity else None
         self.events.append(memory)
-        # Keep only the last 10 memories
-        self.events = self.events[-10:]
+        return evicted
 
 @dataclass
 class LongTermMemory:
     people: Dict[str, Memory] = field(default_factory=dict)
     events: Dict[str, Memory] = field(default_factory=dict)
     places: Dict[str, Memory] = field(default_factory=dict)
+    # Most memories kept per category; the least important one is forgotten first
+    capacity: int = 100
+    # Short-term memories below this importance are forgotten instead of consolidated
+    consolidation_threshold: float = 0.3
+    # Per-category min-heaps of (importance, sequence, key). Entries for overwritten
+    # keys are left in place and skipped when they surface.
+    _heaps: Dict[str, List[Tuple[float, int, str]]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _sequences: Dict[str, Dict[str, int]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _counter: int = field(default=0, init=False, repr=False, compare=False)
 
-    def add_memory(self, category: str, key: str, memory: Memory):
-        if category in ['people', 'events', 'places']:
-            getattr(self, category)[key] = memory
+    def __post_init__(self):
+        for category in MEMORY_CATEGORIES:
+            self._heaps[category] = []
+            self._sequences[category] = {}
+            for key, memory in list(getattr(self, category).items()):
+                self._track(category, key, memory)
+            self._enforce_capacity(category)
+
+    def add_memory(self, category: str, key: str, memory: Memory) -> List[Memory]:
+        # Returns the memories forgotten to make room, including one replaced under the same key
+        if category in MEMORY_CATEGORIES:
+            memories = getattr(self, category)
+            replaced = memories.get(key)
+            memories[key] = memory
+            self._track(category, key, memory)
+            forgotten = self._enforce_capacity(category)
+            if replaced is not None and replaced is not memory:
+                forgotten.append(replaced)
+            return forgotten
         else:
-            raise ValueError(f"Invalid category: {category}")
\ No newline at end of file
+            raise ValueError(f"Invalid category: {category}")
+
+    def consolidate(self, memory: Memory) -> List[Memory]:
+        # Keeps a memory that fell out of short-term memory if it mattered enough.
+        # Returns every memory that is now forgotten, possibly including this one.
+        if memory.importance < self.consolidation_threshold:
+            return [memory]
+        number = len(self.events) + 1
+        while f"moment {number}" in self.events:
+            number += 1
+        return self.add_memory('events', f"moment {number}", memory)
+
+    def all_memories(self) -> List[Memory]:
+        return [memory for category in MEMORY_CATEGORIES for memory in getattr(self, category).values()]
+
+    def _track(self, category: str, key: str, memory: Memory):
+        self._counter += 1
+        self._sequences[category][key] = self._counter
+        heapq.heappush(self._heaps[category], (memory.importance, self._counter, key))
+
+    def _enforce_capacity(self, category: str) -> List[Memory]:
+        memories = getattr(self, category)
+        heap = self._heaps[category]
+        sequences = self._sequences[category]
+        forgotten = []
+        while len(memories) > self.capacity:
+            _, sequence, key = heapq.heappop(heap)
+            if sequences.get(key) == sequence:
+                forgotten.append(memories.pop(key))
+                del sequences[key]
+        # Drop stale entries once they dominate the heap so it stays O(capacity)
+        if len(heap) > 2 * max(len(memories), self.capacity):
+            self._heaps[category] = [entry for entry in heap if sequences.get(entry[2]) == entry[1]]
+            heapq.heapify(self._heaps[category])
+        return forgotten
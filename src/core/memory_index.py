@@ -0,0 +1,96 @@
+# src\core\memory_index.py
+import math
+import re
+import zlib
+from array import array
+from typing import Dict, List
+
+import numpy as np
+
+from .memory import Memory
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def _features(text: str) -> List[str]:
+    # Words plus character trigrams, so "fed" still overlaps with "feeding"
+    features = []
+    for word in _WORD.findall(text.lower()):
+        features.append(word)
+        padded = f"#{word}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+class MemoryIndex:
+    # Offline relevance index over a pet's memories. Each memory is a hashed bag of words and
+    # character trigrams, kept sparse as the buckets it hits and their L2-normalised log term
+    # frequencies, appended to flat arrays shared by all of the pet's memories. Search derives
+    # document frequencies from those arrays for the inverse-document-frequency weights and
+    # scores every memory with one reduceat.
+    #
+    # A memory touches a few dozen of the buckets, so it costs a few hundred bytes instead of a
+    # dense row, and nothing is sized by the number of buckets until a query comes in.
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+        self._memories: List[Memory] = []
+        # Memory i owns _buckets[_ends[i - 1]:_ends[i]] and the matching _weights
+        self._buckets = array("I")
+        self._weights = array("f")
+        self._ends = array("I")
+
+    def __len__(self) -> int:
+        return len(self._memories)
+
+    def _vector(self, text: str) -> Dict[int, float]:
+        counts: Dict[int, float] = {}
+        for feature in _features(text):
+            bucket = zlib.crc32(feature.encode("utf-8")) % self.dimensions
+            counts[bucket] = counts.get(bucket, 0.0) + 1.0
+        return {bucket: math.log1p(count) for bucket, count in counts.items()}
+
+    def add(self, memory: Memory):
+        vector = self._vector(memory.content)
+        if not vector:
+            return
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        self._buckets.extend(vector)
+        self._weights.extend(weight / norm for weight in vector.values())
+        self._ends.append(len(self._buckets))
+        self._memories.append(memory)
+
+    def remove(self, memory: Memory) -> bool:
+        for position, stored in enumerate(self._memories):
+            if stored is memory:
+                start = self._ends[position - 1] if position else 0
+                end = self._ends[position]
+                del self._buckets[start:end], self._weights[start:end], self._ends[position], self._memories[position]
+                for later in range(position, len(self._ends)):
+                    self._ends[later] -= end - start
+                return True
+        return False
+
+    def search(self, query: str, k: int = 3, min_score: float = 0.05) -> List[Memory]:
+        count = len(self._memories)
+        if not count or k <= 0:
+            return []
+        query_vector = self._vector(query)
+        if not query_vector:
+            return []
+        buckets = np.frombuffer(self._buckets, dtype=np.uint32)
+        # A memory hits each of its buckets once, so bucket counts are document frequencies
+        document_frequency = np.bincount(buckets, minlength=self.dimensions)
+        weighted = np.zeros(self.dimensions, dtype=np.float32)
+        for bucket, weight in query_vector.items():
+            idf = math.log((1.0 + count) / (1.0 + document_frequency[bucket])) + 1.0
+            weighted[bucket] = weight * idf * idf
+        weighted /= float(np.linalg.norm(weighted))
+
+        starts = np.zeros(count, dtype=np.int64)
+        starts[1:] = np.frombuffer(self._ends, dtype=np.uint32)[:-1]
+        scores = np.add.reduceat(np.frombuffer(self._weights, dtype=np.float32) * weighted[buckets], starts)
+        k = min(k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self._memories[i] for i in top if scores[i] >= min_score]
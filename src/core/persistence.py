@@ -0,0 +1,246 @@
+# src\core\persistence.py
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .memory import Memory
+from .pet import Pet, TurnRecord
+from .serialization import pet_from_dict, pet_to_dict
+from .states import EmotionalStateDelta, PhysicalStateDelta
+
+# Snapshots and journal entries are JSON, never pickle, so a store directory holds data only
+SNAPSHOT_MAGIC = b"PET2"
+# Journal entries are framed as (payload length, crc32 of payload) followed by the payload
+_FRAME = struct.Struct("<II")
+
+
+def _encode_turn(sequence: int, turn: TurnRecord) -> bytes:
+    memory = [turn.memory.content, turn.memory.importance] if turn.memory is not None else None
+    return json.dumps([
+        sequence,
+        turn.timestamp,
+        turn.emotional_delta.variable_deltas,
+        turn.physical_delta.variable_deltas,
+        turn.interaction,
+        memory,
+        turn.response,
+        turn.source
+    ], separators=(",", ":")).encode("utf-8")
+
+
+def _decode_turn(payload: bytes) -> Tuple[int, TurnRecord]:
+    try:
+        sequence, timestamp, emotional, physical, interaction, memory, response, source = json.loads(payload)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Malformed journal entry: {str(e)}")
+    return sequence, TurnRecord(
+        timestamp=timestamp,
+        emotional_delta=EmotionalStateDelta(variable_deltas=emotional),
+        physical_delta=PhysicalStateDelta(variable_deltas=physical),
+        interaction=interaction,
+        memory=Memory(content=memory[0], importance=memory[1]) if memory is not None else None,
+        response=response,
+        source=source
+    )
+
+
+class PetStore:
+    # Durable pet state as a compressed JSON snapshot plus an append-only journal of turns.
+    # Each turn costs one small append; loading replays the journal onto the snapshot, and
+    # compaction folds long journals back into a fresh snapshot, in the background if started.
+
+    def __init__(self, directory: str, compact_after: int = 200, fsync: bool = False):
+        self.directory = directory
+        self.compact_after = compact_after
+        self.fsync = fsync
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # pet_id -> (last journaled sequence, journal entries since the snapshot)
+        self._journal_state: Dict[str, Tuple[int, int]] = {}
+        self._compactor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    def _lock(self, pet_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(pet_id, threading.Lock())
+
+    def _snapshot_path(self, pet_id: str) -> str:
+        return os.path.join(self.directory, f"{pet_id}.snapshot")
+
+    def _journal_path(self, pet_id: str) -> str:
+        return os.path.join(self.directory, f"{pet_id}.journal")
+
+    def exists(self, pet_id: str) -> bool:
+        return os.path.exists(self._snapshot_path(pet_id))
+
+    def save(self, pet_id: str, pet: Pet):
+        # Full checkpoint: writes a snapshot and starts an empty journal
+        with self._lock(pet_id):
+            sequence = self._sequence(pet_id)
+            self._write_snapshot(pet_id, pet, sequence)
+            self._reset_journal(pet_id, sequence)
+
+    def append(self, pet_id: str, turn: TurnRecord):
+        with self._lock(pet_id):
+            if not self.exists(pet_id):
+                raise FileNotFoundError(f"No snapshot for pet {pet_id}; save it before journaling turns")
+            sequence, entries = self._journal_state.get(pet_id) or self._scan_journal(pet_id)
+            sequence += 1
+            payload = _encode_turn(sequence, turn)
+            with open(self._journal_path(pet_id), "ab") as f:
+                f.write(_FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._journal_state[pet_id] = (sequence, entries + 1)
+
+    def load(self, pet_id: str) -> Optional[Pet]:
+        with self._lock(pet_id):
+            return self._load_locked(pet_id)
+
+    def turns(self, pet_id: str) -> List[TurnRecord]:
+        # Journaled turns not yet folded into the snapshot, oldest first
+        with self._lock(pet_id):
+            snapshot = self._read_snapshot(pet_id)
+            if snapshot is None:
+                return []
+            return [turn for sequence, turn in self._read_journal(pet_id) if sequence > snapshot[0]]
+
+    def compact(self, pet_id: str):
+        with self._lock(pet_id):
+            pet = self._load_locked(pet_id)
+            if pet is not None:
+                sequence = self._journal_state[pet_id][0]
+                self._write_snapshot(pet_id, pet, sequence)
+                self._reset_journal(pet_id, sequence)
+
+    def delete(self, pet_id: str):
+        with self._lock(pet_id):
+            for path in (self._snapshot_path(pet_id), self._journal_path(pet_id)):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._journal_state.pop(pet_id, None)
+
+    def pets_due_for_compaction(self) -> List[str]:
+        return [pet_id for pet_id, (_, entries) in list(self._journal_state.items()) if entries >= self.compact_after]
+
+    def start_compactor(self, interval: float = 30.0, ready: Optional[Callable[[str], bool]] = None):
+        # Any process that keeps a store open while journaling should run this, or journals grow
+        # without bound. ready can hold a pet back while its journal still has to stay readable.
+        if self._compactor is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                for pet_id in self.pets_due_for_compaction():
+                    if ready is not None and not ready(pet_id):
+                        continue
+                    try:
+                        self.compact(pet_id)
+                    except Exception as e:
+                        print(f"Compacting pet {pet_id} failed: {str(e)}")
+
+        self._compactor = threading.Thread(target=run, name="pet-compactor", daemon=True)
+        self._compactor.start()
+
+    def stop_compactor(self):
+        if self._compactor is not None:
+            self._stop.set()
+            self._compactor.join()
+            self._compactor = None
+
+    def _sequence(self, pet_id: str) -> int:
+        state = self._journal_state.get(pet_id)
+        return state[0] if state else self._scan_journal(pet_id)[0]
+
+    def _write_snapshot(self, pet_id: str, pet: Pet, sequence: int):
+        document = {"sequence": sequence, "pet": pet_to_dict(pet)}
+        payload = zlib.compress(json.dumps(document, separators=(",", ":")).encode("utf-8"), 1)
+        path = self._snapshot_path(pet_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_MAGIC + payload)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _read_snapshot(self, pet_id: str) -> Optional[Tuple[int, dict]]:
+        try:
+            with open(self._snapshot_path(pet_id), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if not data.startswith(SNAPSHOT_MAGIC):
+            raise ValueError(f"Corrupt snapshot for pet {pet_id}")
+        document = json.loads(zlib.decompress(data[len(SNAPSHOT_MAGIC):]).decode("utf-8"))
+        return document["sequence"], document["pet"]
+
+    def _reset_journal(self, pet_id: str, sequence: int):
+        # The snapshot records the sequence it covers, so a crash before this truncation
+        # only leaves entries that replay will skip
+        open(self._journal_path(pet_id), "wb").close()
+        self._journal_state[pet_id] = (sequence, 0)
+
+    def _read_journal(self, pet_id: str) -> Iterator[Tuple[int, TurnRecord]]:
+        path = self._journal_path(pet_id)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            valid_end = 0
+            while True:
+                header = f.read(_FRAME.size)
+                if len(header) < _FRAME.size:
+                    break
+                length, checksum = _FRAME.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length:
+                    break
+                if zlib.crc32(payload) != checksum:
+                    # Only the final frame can be a torn write; a bad frame with valid data after
+                    # it is corruption, and truncating here would destroy those later turns
+                    if f.read(1):
+                        raise ValueError(f"Corrupt journal for pet {pet_id} at offset {valid_end}")
+                    break
+                valid_end = f.tell()
+                yield _decode_turn(payload)
+            torn = f.tell() != valid_end
+        if torn:
+            # A write interrupted by a crash at the end of the journal; drop it so later appends
+            # stay readable
+            with open(path, "r+b") as f:
+                f.truncate(valid_end)
+
+    def _scan_journal(self, pet_id: str) -> Tuple[int, int]:
+        snapshot = self._read_snapshot(pet_id)
+        sequence = snapshot[0] if snapshot else 0
+        entries = 0
+        for entry_sequence, _ in self._read_journal(pet_id):
+            if entry_sequence > sequence:
+                sequence = entry_sequence
+                entries += 1
+        self._journal_state[pet_id] = (sequence, entries)
+        return sequence, entries
+
+    def _load_locked(self, pet_id: str) -> Optional[Pet]:
+        snapshot = self._read_snapshot(pet_id)
+        if snapshot is None:
+            return None
+        sequence, data = snapshot
+        pet = pet_from_dict(data)
+        entries = 0
+        for entry_sequence, turn in self._read_journal(pet_id):
+            if entry_sequence <= sequence:
+                continue
+            pet.apply_turn(turn)
+            sequence = entry_sequence
+            entries += 1
+        self._journal_state[pet_id] = (sequence, entries)
+        return pet
@@ -1,15 +1,43 @@
 # src\core\pet.py
-from dataclasses import dataclass
-from .states import EmotionalState, PhysicalState
-from .memory import LongTermMemory, ShortTermMemory
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+from .states import EmotionalState, PhysicalState, EmotionalStateDelta, PhysicalStateDelta
+from .memory import Memory, LongTermMemory, ShortTermMemory
+from .memory_index import MemoryIndex
 from .updaters import (
+    InteractionAnalysis,
+    process_interaction_fused,
     process_interaction_to_emotional_delta,
     process_interaction_to_physical_delta,
     apply_emotional_delta,
     apply_physical_delta,
     process_interaction_as_pet_memory,
-    process_interaction_for_pet_response
+    process_interaction_for_pet_response,
+    stream_interaction_for_pet_response
 )
+from src.utils.streaming import drain
+from src.utils.tracing import propagate, span
+
+# Shared pool for the independent LLM round-trips of a turn. The calls are I/O bound,
+# so a handful of threads is enough to overlap them across all pets in the process.
+_llm_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="pet-llm")
+
+T = TypeVar("T")
+
+@dataclass
+class TurnRecord:
+    # One change to a pet: an interaction, or time-based decay when interaction is None
+    timestamp: float
+    emotional_delta: EmotionalStateDelta
+    physical_delta: PhysicalStateDelta
+    interaction: Optional[str] = None
+    memory: Optional[Memory] = None
+    response: Optional[str] = None
+    # Where an imported turn came from (e.g. a bulk replay input line), so a resumed import can
+    # tell which turns it already journaled
+    source: Optional[str] = None
 
 @dataclass
 class Pet:
@@ -19,61 +47,156 @@ class Pet:
     short_term_memory: ShortTermMemory
     name: str
     age: int
+    # Analyse each interaction with one structured-output call instead of four separate calls
+    fused_analysis: bool = False
+    # Wall-clock time up to which time-based decay has been applied (see ticks.DecayEngine)
+    last_tick: float = field(default_factory=time.time)
+    # Relevance index over every memory the pet still holds, used to pick prompt context
+    memory_index: MemoryIndex = field(default_factory=MemoryIndex, repr=False, compare=False)
+    # The most recent interaction, kept so callers can journal it
+    last_turn: Optional[TurnRecord] = field(default=None, repr=False, compare=False)
+    # Bumped by every change to the states or memories, so it doubles as a cache invalidation key
+    version: int = field(default=0, repr=False, compare=False)
+    # key -> (version it was built at, rendered value)
+    _renders: Dict[str, Tuple[int, Any]] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not len(self.memory_index):
+            for memory in self.long_term_memory.all_memories():
+                self.memory_index.add(memory)
+            for memory in self.short_term_memory.events:
+                self.memory_index.add(memory)
 
     def update_physical_description(self):
         # This method can be called to update the physical description based on the pet's current state
         # Implementation will depend on how you want to handle physical changes
         pass
 
-    def process_interaction(self, interaction: str) -> str:
+    def infer_deltas(self, interaction: str) -> Tuple[EmotionalStateDelta, PhysicalStateDelta]:
+        # The emotional and physical deltas only depend on the interaction, so run them side by side
+        physical_future = _llm_executor.submit(propagate(process_interaction_to_physical_delta), interaction)
+        emotional_delta = process_interaction_to_emotional_delta(interaction)
+        return emotional_delta, physical_future.result()
+
+    @property
+    def last_memory(self) -> Optional[Memory]:
+        return self.short_term_memory.events[-1] if self.short_term_memory.events else None
+
+    def process_interaction(self, interaction: str, on_response_chunk: Optional[Callable[[str], None]] = None) -> str:
+        # With on_response_chunk the response is streamed to the callback as it is generated.
+        # Streaming always uses the separate calls, since the response is the part worth streaming.
+        with span("pet.process_interaction", streaming=on_response_chunk is not None) as turn_span:
+            analysis = None
+            if self.fused_analysis and on_response_chunk is None:
+                analysis = process_interaction_fused(
+                    interaction,
+                    self.emotional_state,
+                    self.physical_state,
+                    self.last_memory,
+                    self.physical_state.description,
+                    self.recall(interaction)
+                )
+            turn_span.set(path="fused" if analysis is not None else "split")
+            if analysis is None:
+                analysis = self.analyze_interaction(interaction, on_response_chunk)
+
+            self.last_turn = TurnRecord(
+                timestamp=time.time(),
+                emotional_delta=analysis.emotional_delta,
+                physical_delta=analysis.physical_delta,
+                interaction=interaction,
+                memory=analysis.memory,
+                response=analysis.response
+            )
+            self.apply_turn(self.last_turn)
+
+        return analysis.response
+
+    def apply_turn(self, turn: TurnRecord):
+        # Journal replay goes through here too, so the outcome must depend only on the record
+        self.emotional_state = apply_emotional_delta(self.emotional_state, turn.emotional_delta)
+        self.physical_state = apply_physical_delta(self.physical_state, turn.physical_delta)
+        if turn.memory is not None:
+            self.remember(turn.memory)
+        if turn.interaction is None:
+            self.last_tick = turn.timestamp
+
+        # Update physical description
+        self.update_physical_description()
+        self.touch()
+
+    def remember(self, memory: Memory):
+        evicted = self.short_term_memory.add_memory(memory)
+        self.memory_index.add(memory)
+        if evicted is not None:
+            for forgotten in self.long_term_memory.consolidate(evicted):
+                self.memory_index.remove(forgotten)
+        self.touch()
+
+    def touch(self):
+        # Call after changing the pet any other way than apply_turn/remember (e.g. batch write-back)
+        self.version += 1
+
+    def render(self, key: str, build: Callable[['Pet'], T]) -> T:
+        # Memoized view of the pet, rebuilt only once the version has moved on. The version is read
+        # before building, so a render that races a change is simply rebuilt on the next call.
+        version = self.version
+        entry = self._renders.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = build(self)
+        self._renders[key] = (version, value)
+        return value
+
+    def recall(self, query: str, k: int = 3) -> List[Memory]:
+        # Memories most related to the query, skipping the latest one which prompts already include
+        last_memory = self.last_memory
+        return [memory for memory in self.memory_index.search(query, k + 1) if memory is not last_memory][:k]
+
+    def analyze_interaction(self, interaction: str, on_response_chunk: Optional[Callable[[str], None]] = None) -> InteractionAnalysis:
         # Store initial states
         initial_emotional_state = self.emotional_state
         initial_physical_state = self.physical_state
 
-        # Process emotional changes
-        emotional_delta = process_interaction_to_emotional_delta(interaction)
-        new_emotional_state = apply_emotional_delta(self.emotional_state, emotional_delta)
-
-        # Process physical changes
-        physical_delta = process_interaction_to_physical_delta(interaction)
-        new_physical_state = apply_physical_delta(self.physical_state, physical_delta)
+        # Stage 1: emotional and physical changes
+        emotional_delta, physical_delta = self.infer_deltas(interaction)
 
-        # Generate memory
-        memory = process_interaction_as_pet_memory(
+        # Stage 2: memory and response both depend only on the deltas
+        memory_future = _llm_executor.submit(
+            propagate(process_interaction_as_pet_memory),
             interaction,
             initial_emotional_state,
             initial_physical_state,
             emotional_delta,
             physical_delta
         )
-
-        # Generate pet's response
-        response = process_interaction_for_pet_response(
+        response_args = (
             interaction,
             initial_emotional_state,
             initial_physical_state,
             emotional_delta,
             physical_delta,
-            self.short_term_memory.events[-1] if self.short_term_memory.events else None,
-            self.physical_state.description
+            self.last_memory,
+            self.physical_state.description,
+            self.recall(interaction)
         )
+        if on_response_chunk is None:
+            response = process_interaction_for_pet_response(*response_args)
+        else:
+            response = drain(stream_interaction_for_pet_response(*response_args), on_response_chunk)
+        memory = memory_future.result()
 
-        # Update pet state
-        self.emotional_state = new_emotional_state
-        self.physical_state = new_physical_state
-        self.short_term_memory.events.append(memory)
-
-        # Update physical description
-        self.update_physical_description()
-
-        return response
+        return InteractionAnalysis(emotional_delta, physical_delta, memory, response)
 
     def summarize_state(self) -> str:
+        return self.render("summary", Pet._summarize_state)
+
+    def _summarize_state(self) -> str:
         return f"""
         Name: {self.name}
         Age: {self.age}
         Physical Description: {self.physical_state.description}
         Emotional State: {self.emotional_state}
         Physical State: {self.physical_state.variables}
-        Recent Memory: {self.short_term_memory.events[-1] if self.short_term_memory.events else 'No recent memories'}
-        """
\ No newline at end of file
+        Recent Memory: {self.last_memory or 'No recent memories'}
+        """
@@ -0,0 +1,174 @@
+# src\core\prompts.py
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from .states import EmotionalState, PhysicalState, PhysicalDescription, LatentVariable
+
+# Input token budget per call, for the user/system text we control (not the model's output)
+PROMPT_BUDGETS: Dict[str, int] = {
+    "emotional_delta": 300,
+    "physical_delta": 300,
+    "memory": 450,
+    "response": 600,
+    "analysis": 700,
+    "scenario": 1000,
+}
+DEFAULT_BUDGET = 800
+# Free text the player types is capped on its own so one long message cannot crowd out everything else
+MAX_INTERACTION_TOKENS = 120
+
+_PIECE = re.compile(r"[A-Za-z]+|\d+|\S")
+
+
+def estimate_tokens(text: str) -> int:
+    # Close to BPE counts for English prose: words cost a token per ~4 letters,
+    # numbers a token per ~3 digits, every other symbol a token
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        if piece[0].isalpha():
+            tokens += (len(piece) + 3) // 4
+        elif piece[0].isdigit():
+            tokens += (len(piece) + 2) // 3
+        else:
+            tokens += 1
+    return tokens
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    tokens = 0
+    for match in _PIECE.finditer(text):
+        piece = match.group()
+        if piece[0].isalpha():
+            tokens += (len(piece) + 3) // 4
+        elif piece[0].isdigit():
+            tokens += (len(piece) + 2) // 3
+        else:
+            tokens += 1
+        if tokens > max_tokens:
+            return text[:match.start()].rstrip() + " ..."
+    return text
+
+
+def compact_lines(text: str) -> str:
+    # Drops the indentation and blank lines that triple-quoted prompts carry, which tokenizers charge for
+    return "\n".join(line.strip() for line in text.strip().splitlines() if line.strip())
+
+
+def _number(value: float) -> str:
+    return str(int(round(value)))
+
+
+def encode_variables(variables: Iterable[LatentVariable]) -> str:
+    return ", ".join(f"{var.name}={_number(var.value)}" for var in variables)
+
+
+def encode_emotional_state(state: EmotionalState) -> str:
+    return encode_variables(state.variables)
+
+
+def encode_physical_state(state: PhysicalState) -> str:
+    return encode_variables(state.variables)
+
+
+def encode_description(description: PhysicalDescription) -> str:
+    features = ", ".join(description.distinctive_features)
+    text = f"{description.size} {description.color} {description.species}"
+    return f"{text} ({features})" if features else text
+
+
+def encode_deltas(variable_deltas: Dict[str, float]) -> str:
+    changes = [f"{name}{'+' if value > 0 else ''}{_number(value)}" for name, value in variable_deltas.items()
+               if round(value) != 0]
+    return ", ".join(changes) if changes else "no change"
+
+
+def encode_pet(pet) -> str:
+    # Rebuilt only when the pet changes; the scenario prompt uses it every turn
+    return pet.render("prompt", _encode_pet)
+
+
+def _encode_pet(pet) -> str:
+    return (
+        f"{pet.name}, age {pet.age}, {encode_description(pet.physical_state.description)}\n"
+        f"Emotions: {encode_emotional_state(pet.emotional_state)}\n"
+        f"Body: {encode_physical_state(pet.physical_state)}"
+    )
+
+
+@dataclass
+class PromptSection:
+    title: Optional[str]
+    text: str
+    # Sections with lower priority are shortened first; None means never shorten
+    priority: Optional[int] = None
+
+
+class PromptBuilder:
+    # Assembles titled sections into one prompt and shortens the lowest priority sections
+    # until the estimate fits the task's budget
+
+    def __init__(self, task: str, budget: Optional[int] = None):
+        self.task = task
+        self.budget = budget if budget is not None else PROMPT_BUDGETS.get(task, DEFAULT_BUDGET)
+        self.sections: List[PromptSection] = []
+
+    def add(self, title: Optional[str], text: str, priority: Optional[int] = None) -> "PromptBuilder":
+        self.sections.append(PromptSection(title, text.strip(), priority))
+        return self
+
+    @staticmethod
+    def _render(section: PromptSection) -> str:
+        return f"{section.title}:\n{section.text}" if section.title else section.text
+
+    def build(self, reserved_tokens: int = 0) -> str:
+        # reserved_tokens covers text sent alongside this prompt, e.g. the system message
+        rendered = [self._render(section) for section in self.sections]
+        costs = [estimate_tokens(text) for text in rendered]
+        overflow = sum(costs) + reserved_tokens - self.budget
+        shrinkable = sorted(
+            (i for i, section in enumerate(self.sections) if section.priority is not None),
+            key=lambda i: self.sections[i].priority
+        )
+        for i in shrinkable:
+            if overflow <= 0:
+                break
+            section = self.sections[i]
+            keep = estimate_tokens(section.text) - overflow
+            if keep >= 8:
+                rendered[i] = self._render(PromptSection(section.title, truncate_tokens(section.text, keep)))
+            else:
+                rendered[i] = ""
+            overflow -= costs[i] - (estimate_tokens(rendered[i]) if rendered[i] else 0)
+        return "\n\n".join(text for text in rendered if text)
+
+
+@dataclass
+class PromptTokenStats:
+    calls: int = 0
+    total_tokens: int = 0
+    last_tokens: int = 0
+    max_tokens: int = 0
+
+
+_token_stats: Dict[str, PromptTokenStats] = {}
+_token_stats_lock = threading.Lock()
+
+
+def record_prompt_tokens(task: str, *texts: str) -> int:
+    tokens = sum(estimate_tokens(text) for text in texts)
+    with _token_stats_lock:
+        stats = _token_stats.setdefault(task, PromptTokenStats())
+        stats.calls += 1
+        stats.total_tokens += tokens
+        stats.last_tokens = tokens
+        stats.max_tokens = max(stats.max_tokens, tokens)
+    return tokens
+
+
+def prompt_token_stats() -> Dict[str, PromptTokenStats]:
+    with _token_stats_lock:
+        return {task: PromptTokenStats(**vars(stats)) for task, stats in _token_stats.items()}
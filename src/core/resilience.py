@@ -0,0 +1,108 @@
+# src\core\resilience.py
+import random
+import sys
+import threading
+import time
+from typing import Optional
+
+from src.utils.config import get_config
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    # Shared by every session in the process. After failure_threshold consecutive upstream failures
+    # calls are refused outright for reset_timeout seconds; then a single probe call is let through
+    # and its outcome decides whether the circuit closes again.
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            # Open, or half open with the probe still in flight
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def release(self):
+        # For a call that was allowed through but never reached the upstream (e.g. a local bug):
+        # gives up the half-open probe slot without counting a failure, so the next call can probe
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    # Full jitter, so sessions that failed together do not retry together
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def is_upstream_error(e: Exception) -> bool:
+    # Errors that came from talking to the provider, as opposed to bugs in our own code. The SDK
+    # modules are only consulted when already imported: if they are not, they raised nothing.
+    if getattr(e, "status_code", None) is not None or isinstance(e, (TimeoutError, ConnectionError)):
+        return True
+    openai = sys.modules.get("openai")
+    if openai is not None and isinstance(e, openai.APIError):
+        return True
+    httpx = sys.modules.get("httpx")
+    return httpx is not None and isinstance(e, httpx.TransportError)
+
+
+def is_retryable(e: Exception) -> bool:
+    # Rate limits, server errors, timeouts and connection failures are worth another attempt;
+    # other API errors (bad request, auth) would fail the same way again, and local errors
+    # (TypeError, a bad JSON payload) are not the upstream's fault at all
+    if not is_upstream_error(e):
+        return False
+    status = getattr(e, "status_code", None)
+    return status is None or status == 429 or status >= 500
+
+
+_breaker: Optional[CircuitBreaker] = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                config = get_config()
+                _breaker = CircuitBreaker(config.breaker_failure_threshold, config.breaker_reset_timeout)
+    return _breaker
+
+
+def set_circuit_breaker(breaker: Optional[CircuitBreaker]):
+    global _breaker
+    with _breaker_lock:
+        _breaker = breaker
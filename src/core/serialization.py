@@ -0,0 +1,72 @@
+# src\core\serialization.py
+import time
+from dataclasses import asdict
+
+from .memory import MEMORY_CATEGORIES, Memory, LongTermMemory, ShortTermMemory
+from .pet import Pet
+from .states import LatentVariable, EmotionalState, PhysicalState, PhysicalDescription
+
+
+def _state_to_dict(state) -> dict:
+    # Same layout asdict produced when states held LatentVariable lists, so older snapshots still load
+    return {"variables": [{"name": var.name, "value": var.value} for var in state.variables]}
+
+
+def pet_to_dict(pet: Pet) -> dict:
+    long_term = pet.long_term_memory
+    data = {
+        "emotional_state": _state_to_dict(pet.emotional_state),
+        "physical_state": dict(_state_to_dict(pet.physical_state), description=asdict(pet.physical_state.description)),
+        "long_term_memory": {
+            category: {key: asdict(memory) for key, memory in getattr(long_term, category).items()}
+            for category in MEMORY_CATEGORIES
+        },
+        "short_term_memory": {
+            "events": [asdict(memory) for memory in pet.short_term_memory.events],
+            "capacity": pet.short_term_memory.capacity
+        },
+        "name": pet.name,
+        "age": pet.age,
+        "fused_analysis": pet.fused_analysis,
+        "last_tick": pet.last_tick,
+        "version": pet.version
+    }
+    data["long_term_memory"]["capacity"] = long_term.capacity
+    data["long_term_memory"]["consolidation_threshold"] = long_term.consolidation_threshold
+    return data
+
+
+def _variables(data: list) -> list:
+    return [LatentVariable(var["name"], var["value"]) for var in data]
+
+
+def _memories(data: dict) -> dict:
+    return {key: Memory(**memory) for key, memory in data.items()}
+
+
+def pet_from_dict(data: dict) -> Pet:
+    physical = data["physical_state"]
+    long_term = data["long_term_memory"]
+    return Pet(
+        emotional_state=EmotionalState(_variables(data["emotional_state"]["variables"])),
+        physical_state=PhysicalState(
+            variables=_variables(physical["variables"]),
+            description=PhysicalDescription(**physical["description"])
+        ),
+        long_term_memory=LongTermMemory(
+            people=_memories(long_term["people"]),
+            events=_memories(long_term["events"]),
+            places=_memories(long_term["places"]),
+            capacity=long_term.get("capacity", LongTermMemory.capacity),
+            consolidation_threshold=long_term.get("consolidation_threshold", LongTermMemory.consolidation_threshold)
+        ),
+        short_term_memory=ShortTermMemory(
+            events=[Memory(**memory) for memory in data["short_term_memory"]["events"]],
+            capacity=data["short_term_memory"].get("capacity", ShortTermMemory.capacity)
+        ),
+        name=data["name"],
+        age=data["age"],
+        fused_analysis=data.get("fused_analysis", False),
+        last_tick=data.get("last_tick", time.time()),
+        version=data.get("version", 0)
+    )
@@ -1,41 +1,153 @@
 # src\core\states.py
+from array import array
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+EMOTIONAL_VARIABLES = ("happiness", "excitement", "calmness", "curiosity", "affection")
+PHYSICAL_VARIABLES = ("hunger", "tiredness", "health", "cleanliness")
+
+def _clamp(value: float) -> float:
+    return max(-100, min(100, value))  # Ensure value is between -100 and 100
+
+def _public(value: float) -> float:
+    # The array stores doubles; whole numbers are handed out as ints, as they were before
+    # (so prompts and formatted states still read "50", not "50.0")
+    return int(value) if value.is_integer() else value
 
 @dataclass
 class LatentVariable:
+    __slots__ = ("name", "value")
     name: str
     value: float
 
     def __post_init__(self):
-        self.value = max(-100, min(100, self.value))  # Ensure value is between -100 and 100
+        self.value = _clamp(self.value)
 
-@dataclass
-class EmotionalState:
-    variables: List[LatentVariable]
+class _VariableState:
+    # Values live in one array('d') laid out in NAMES order, instead of one LatentVariable object
+    # per variable. Lookups by name go through INDEX; `variables` builds LatentVariable objects on
+    # demand for code that iterates them. States are treated as immutable: apply() returns a copy.
+    # `values` is the raw float array, for vectorised code; every other accessor returns whole
+    # numbers as ints.
+    __slots__ = ("values",)
+    NAMES: Tuple[str, ...] = ()
+    INDEX: Dict[str, int] = {}
 
-    def __post_init__(self):
-        assert len(self.variables) == 5, "EmotionalState must have exactly 5 latent variables"
+    def __init__(self, variables: Iterable[LatentVariable]):
+        variables = list(variables)
+        assert len(variables) == len(self.NAMES), \
+            f"{type(self).__name__} must have exactly {len(self.NAMES)} latent variables"
+        values = array("d", bytes(8 * len(self.NAMES)))
+        seen = set()
+        for var in variables:
+            index = self.INDEX.get(var.name)
+            if index is None:
+                raise ValueError(f"Unknown {type(self).__name__} variable: {var.name}")
+            # With the count checked above, a repeated name means another one is missing
+            if index in seen:
+                raise ValueError(f"Duplicate {type(self).__name__} variable: {var.name}")
+            seen.add(index)
+            values[index] = _clamp(var.value)
+        self.values = values
+
+    def _copy_with(self, values: array) -> '_VariableState':
+        state = object.__new__(type(self))
+        state.values = values
+        return state
+
+    @property
+    def variables(self) -> List[LatentVariable]:
+        return [LatentVariable(name, _public(value)) for name, value in zip(self.NAMES, self.values)]
+
+    def __getitem__(self, name: str) -> float:
+        return _public(self.values[self.INDEX[name]])
+
+    def get(self, name: str, default: Optional[float] = None) -> Optional[float]:
+        index = self.INDEX.get(name)
+        return default if index is None else _public(self.values[index])
+
+    def as_dict(self) -> Dict[str, float]:
+        return dict(zip(self.NAMES, map(_public, self.values)))
+
+    def apply(self, variable_deltas: Dict[str, float]) -> '_VariableState':
+        # Unknown names are ignored, as the per-variable loop this replaces did
+        values = array("d", self.values)
+        index = self.INDEX
+        for name, delta in variable_deltas.items():
+            i = index.get(name)
+            if i is not None:
+                values[i] = _clamp(values[i] + delta)
+        return self._copy_with(values)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.values == other.values
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(variables={self.variables!r})"
+
+class EmotionalState(_VariableState):
+    __slots__ = ()
+    NAMES = EMOTIONAL_VARIABLES
+    INDEX = {name: i for i, name in enumerate(EMOTIONAL_VARIABLES)}
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> 'EmotionalState':
+        # values in EMOTIONAL_VARIABLES order
+        state = object.__new__(cls)
+        state.values = array("d", map(_clamp, values))
+        assert len(state.values) == len(cls.NAMES), "EmotionalState must have exactly 5 latent variables"
+        return state
 
 @dataclass
 class PhysicalDescription:
+    __slots__ = ("species", "color", "size", "distinctive_features")
     species: str
     color: str
     size: str
     distinctive_features: List[str]
 
-@dataclass
-class PhysicalState:
-    variables: List[LatentVariable]
-    description: PhysicalDescription
+class PhysicalState(_VariableState):
+    __slots__ = ("description",)
+    NAMES = PHYSICAL_VARIABLES
+    INDEX = {name: i for i, name in enumerate(PHYSICAL_VARIABLES)}
 
-    def __post_init__(self):
-        assert len(self.variables) == 4, "PhysicalState must have exactly 4 latent variables"
+    def __init__(self, variables: Iterable[LatentVariable], description: PhysicalDescription):
+        super().__init__(variables)
+        self.description = description
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], description: PhysicalDescription) -> 'PhysicalState':
+        # values in PHYSICAL_VARIABLES order
+        state = object.__new__(cls)
+        state.values = array("d", map(_clamp, values))
+        assert len(state.values) == len(cls.NAMES), "PhysicalState must have exactly 4 latent variables"
+        state.description = description
+        return state
+
+    def _copy_with(self, values: array) -> 'PhysicalState':
+        state = super()._copy_with(values)
+        state.description = self.description
+        return state
+
+    def __eq__(self, other):
+        result = super().__eq__(other)
+        return result if result is NotImplemented else result and self.description == other.description
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PhysicalState(variables={self.variables!r}, description={self.description!r})"
 
 @dataclass
 class EmotionalStateDelta:
+    __slots__ = ("variable_deltas",)
     variable_deltas: Dict[str, float]
 
 @dataclass
 class PhysicalStateDelta:
-    variable_deltas: Dict[str, float]
\ No newline at end of file
+    __slots__ = ("variable_deltas",)
+    variable_deltas: Dict[str, float]
@@ -0,0 +1,137 @@
+# src\core\ticks.py
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
+
+from .pet import Pet, TurnRecord
+from .states import EmotionalStateDelta, PhysicalStateDelta, EMOTIONAL_VARIABLES, PHYSICAL_VARIABLES
+
+if TYPE_CHECKING:
+    import numpy as np
+    from .batch import PetStateBatch
+    from .persistence import PetStore
+
+SECONDS_PER_HOUR = 3600.0
+
+
+@dataclass(frozen=True)
+class DecayRule:
+    # Change per hour of wall-clock time. With a target the variable drifts towards it
+    # at abs(rate) per hour and stops there, instead of moving without bound.
+    rate: float
+    target: Optional[float] = None
+
+    def delta(self, value: float, hours: float) -> float:
+        step = self.rate * hours
+        if self.target is None:
+            return step
+        step = abs(step)
+        return max(-step, min(step, self.target - value))
+
+
+DEFAULT_DECAY_RULES: Dict[str, DecayRule] = {
+    "hunger": DecayRule(4.0),
+    "tiredness": DecayRule(2.0),
+    "cleanliness": DecayRule(-1.5),
+    "health": DecayRule(0.0),
+    "happiness": DecayRule(1.0, target=50.0),
+    "excitement": DecayRule(3.0, target=50.0),
+    "calmness": DecayRule(1.0, target=50.0),
+    "curiosity": DecayRule(1.0, target=50.0),
+    "affection": DecayRule(0.5, target=50.0),
+}
+
+
+class DecayEngine:
+    # Advances pets through wall-clock time without LLM calls. Nothing runs in the background:
+    # a pet catches up on the time since its last tick when it is next touched (advance), and
+    # whole fleets can be stepped at once as arrays (tick_batch / advance_many).
+
+    def __init__(self, rules: Optional[Dict[str, DecayRule]] = None,
+                 min_interval: float = 60.0, max_catch_up: float = 7 * 24 * SECONDS_PER_HOUR):
+        self.rules = dict(DEFAULT_DECAY_RULES if rules is None else rules)
+        # Elapsed time below min_interval is left to accumulate; above max_catch_up it is capped
+        self.min_interval = min_interval
+        self.max_catch_up = max_catch_up
+
+    def deltas_for(self, pet: Pet, elapsed_seconds: float):
+        hours = min(elapsed_seconds, self.max_catch_up) / SECONDS_PER_HOUR
+        emotional = {
+            var.name: self.rules[var.name].delta(var.value, hours)
+            for var in pet.emotional_state.variables if var.name in self.rules
+        }
+        physical = {
+            var.name: self.rules[var.name].delta(var.value, hours)
+            for var in pet.physical_state.variables if var.name in self.rules
+        }
+        return EmotionalStateDelta(variable_deltas=emotional), PhysicalStateDelta(variable_deltas=physical)
+
+    def advance(self, pet: Pet, now: Optional[float] = None) -> Optional[TurnRecord]:
+        # Returns the applied decay as a TurnRecord, or None when too little time has passed
+        now = time.time() if now is None else now
+        elapsed = now - pet.last_tick
+        if elapsed < self.min_interval:
+            return None
+        emotional_delta, physical_delta = self.deltas_for(pet, elapsed)
+        tick = TurnRecord(timestamp=now, emotional_delta=emotional_delta, physical_delta=physical_delta)
+        pet.apply_turn(tick)
+        return tick
+
+    def _columns(self, names: Sequence[str]):
+        import numpy as np
+        rules = [self.rules.get(name, DecayRule(0.0)) for name in names]
+        rates = np.array([rule.rate for rule in rules])
+        targets = np.array([rule.target if rule.target is not None else np.nan for rule in rules])
+        return rates, targets
+
+    def _step(self, values: "np.ndarray", names: Sequence[str], hours: "np.ndarray") -> "np.ndarray":
+        import numpy as np
+        rates, targets = self._columns(names)
+        steps = hours[:, None] * rates[None, :]
+        has_target = ~np.isnan(targets)
+        limit = np.abs(steps[:, has_target])
+        steps[:, has_target] = np.clip(targets[has_target] - values[:, has_target], -limit, limit)
+        return steps
+
+    def tick_batch(self, batch: "PetStateBatch", elapsed_seconds: Union[float, "np.ndarray"]):
+        # elapsed_seconds is one value for every pet or one per pet. Returns the (emotional, physical)
+        # steps that were applied, one row per pet.
+        import numpy as np
+        elapsed = np.broadcast_to(np.asarray(elapsed_seconds, dtype=np.float64), (len(batch),))
+        hours = np.minimum(elapsed, self.max_catch_up) / SECONDS_PER_HOUR
+        emotional_steps = self._step(batch.emotional, EMOTIONAL_VARIABLES, hours)
+        physical_steps = self._step(batch.physical, PHYSICAL_VARIABLES, hours)
+        batch.apply_emotional_deltas(emotional_steps)
+        batch.apply_physical_deltas(physical_steps)
+        return emotional_steps, physical_steps
+
+    def advance_many(self, pets: Sequence[Pet], now: Optional[float] = None, store: Optional["PetStore"] = None,
+                     pet_ids: Optional[Sequence[str]] = None) -> List[Optional[TurnRecord]]:
+        # Bulk version of advance for resident Pet objects. Returns one TurnRecord per pet (None where
+        # too little time has passed) that replays to exactly the batch result; with a store, each is
+        # journaled under the matching pet id, as Game.advance_time does for a single pet.
+        import numpy as np
+        from .batch import PetStateBatch
+        if store is not None and (pet_ids is None or len(pet_ids) != len(pets)):
+            raise ValueError("Journaling decay needs one pet id per pet")
+        now = time.time() if now is None else now
+        ticks: List[Optional[TurnRecord]] = [None] * len(pets)
+        due = [i for i, pet in enumerate(pets) if now - pet.last_tick >= self.min_interval]
+        if not due:
+            return ticks
+        due_pets = [pets[i] for i in due]
+        batch = PetStateBatch.from_pets(due_pets)
+        emotional_steps, physical_steps = self.tick_batch(batch, np.array([now - pet.last_tick for pet in due_pets]))
+        batch.write_back(due_pets)
+        emotional_columns = [(j, name) for j, name in enumerate(EMOTIONAL_VARIABLES) if name in self.rules]
+        physical_columns = [(j, name) for j, name in enumerate(PHYSICAL_VARIABLES) if name in self.rules]
+        for row, i in enumerate(due):
+            pets[i].last_tick = now
+            ticks[i] = TurnRecord(
+                timestamp=now,
+                emotional_delta=EmotionalStateDelta({name: float(emotional_steps[row, j]) for j, name in emotional_columns}),
+                physical_delta=PhysicalStateDelta({name: float(physical_steps[row, j]) for j, name in physical_columns})
+            )
+            if store is not None:
+                store.append(pet_ids[i], ticks[i])
+        return ticks
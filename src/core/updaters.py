@@ -1,120 +1,273 @@
 # src\core\updaters.py
-import os
 import json
-from openai import OpenAI
-from dotenv import load_dotenv
-
+import threading
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, Generator, List, Optional, Union
+
+from .cache import get_delta_cache, make_delta_key
+from .coalescing import MicroBatcher
+from .fallback import fallback_emotional_delta, fallback_physical_delta
+from .llm import create_json_completion, stream_json_completion
 from .memory import Memory
-from .states import LatentVariable, EmotionalState, PhysicalState, EmotionalStateDelta, PhysicalStateDelta, PhysicalDescription
+from .prompts import (
+    MAX_INTERACTION_TOKENS, PromptBuilder, encode_deltas, encode_description, encode_emotional_state,
+    encode_physical_state, truncate_tokens
+)
+from .states import (
+    LatentVariable, EmotionalState, PhysicalState, EmotionalStateDelta, PhysicalStateDelta, PhysicalDescription,
+    EMOTIONAL_VARIABLES, PHYSICAL_VARIABLES
+)
+from src.utils.config import get_config
+from src.utils.streaming import stream_json_field
+from src.utils.tracing import current_span, record_error, traced
+
+# Bump when the matching system prompt changes so cached deltas from the old prompt are not reused
+EMOTIONAL_DELTA_PROMPT_VERSION = 2
+PHYSICAL_DELTA_PROMPT_VERSION = 2
+DELTA_BATCH_PROMPT_VERSION = 1
+
+EMOTIONAL_DELTA_SYSTEM_MESSAGE = """
+    You are an AI assistant that interprets interactions with a virtual pet and outputs emotional changes.
+    The pet has 5 emotional states: happiness, excitement, calmness, curiosity, and affection.
+    Each state can change between -10 and 10 based on the interaction, or remain unchanged (0).
+    Output a JSON object with the changes for each emotional state.
+    If a state is unaffected by the interaction, set its value to 0.
+    Your response should be a valid JSON object.
+    """
 
-load_dotenv(override=True)
+PHYSICAL_DELTA_SYSTEM_MESSAGE = """
+    You are an AI assistant that interprets interactions with a virtual pet and outputs physical state changes.
+    The pet has 4 physical states: hunger, tiredness, health, and cleanliness.
+    Each state can change between -10 and 10 based on the interaction, or remain unchanged (0).
+    Output a JSON object with the changes for each physical state.
+    If a state is unaffected by the interaction, set its value to 0.
+    Your response should be a valid JSON object.
+    """
+
+
+def delta_user_message(interaction: str) -> str:
+    return f"Interpret this interaction with the virtual pet: {truncate_tokens(interaction, MAX_INTERACTION_TOKENS)}"
+
+
+def delta_cache_key(kind: str, interaction: str, batched: bool = False) -> str:
+    # kind is "emotional" or "physical"; deltas from the batch prompt are cached apart from single-call ones
+    if batched:
+        return make_delta_key(f"{kind}_batch", interaction, get_config().model, DELTA_BATCH_PROMPT_VERSION)
+    version = EMOTIONAL_DELTA_PROMPT_VERSION if kind == "emotional" else PHYSICAL_DELTA_PROMPT_VERSION
+    return make_delta_key(kind, interaction, get_config().model, version)
+
+
+DELTA_BATCH_SYSTEM_MESSAGE = """
+    You are an AI assistant that interprets interactions with a virtual pet and outputs {kind} state changes.
+    The pet has {count} {kind} states: {names}.
+    You will receive a JSON object listing several numbered interactions. Judge each interaction on its own.
+    For every interaction, each state can change between -10 and 10 based on that interaction, or remain unchanged (0).
+    Output a JSON object with a 'results' list holding one entry per interaction: its 'id' and its 'changes'.
+    """
+
+
+def _delta_batch_schema(keys) -> dict:
+    return {
+        "name": "delta_batch",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"id": {"type": "integer"}, "changes": _delta_schema(keys)},
+                        "required": ["id", "changes"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["results"],
+            "additionalProperties": False
+        }
+    }
+
+
+def delta_batch_user_message(interactions: List[str]) -> str:
+    return json.dumps({"interactions": [
+        {"id": i, "text": truncate_tokens(interaction, MAX_INTERACTION_TOKENS)}
+        for i, interaction in enumerate(interactions, 1)
+    ]})
+
+
+def _run_delta_batch(kind: str, interactions: List[str]) -> List[Union[Dict[str, float], Exception]]:
+    # One structured-output call for several interactions, split back into one delta dict each.
+    # An entry that is missing or invalid fails only the callers waiting on that interaction.
+    keys = EMOTIONAL_VARIABLES if kind == "emotional" else PHYSICAL_VARIABLES
+    system_message = DELTA_BATCH_SYSTEM_MESSAGE.format(kind=kind, count=len(keys), names=", ".join(keys))
+    response = create_json_completion(
+        system_message,
+        delta_batch_user_message(interactions),
+        response_format={"type": "json_schema", "json_schema": _delta_batch_schema(keys)},
+        task=f"{kind}_delta_batch"
+    )
+    if response.finish_reason == "length":
+        raise ValueError("Batched delta response was cut off. Try a smaller delta_batch_size.")
+
+    by_id = {
+        entry.get("id"): entry.get("changes")
+        for entry in json.loads(response.content).get("results", []) if isinstance(entry, dict)
+    }
+    results: List[Union[Dict[str, float], Exception]] = []
+    for i in range(1, len(interactions) + 1):
+        changes = by_id.get(i)
+        try:
+            if not isinstance(changes, dict):
+                raise ValueError(f"No {kind} changes returned for interaction {i} of the batch")
+            results.append(_validate_deltas(changes, keys))
+        except ValueError as e:
+            results.append(e)
+    return results
+
+
+_delta_batchers: Dict[str, MicroBatcher] = {}
+_delta_batchers_lock = threading.Lock()
+
+
+def get_delta_batcher(kind: str) -> Optional[MicroBatcher]:
+    # One batcher per delta kind, shared by every session in the process; None while batching is off
+    config = get_config()
+    if config.delta_batch_size <= 1:
+        return None
+    batcher = _delta_batchers.get(kind)
+    if batcher is None:
+        with _delta_batchers_lock:
+            batcher = _delta_batchers.get(kind)
+            if batcher is None:
+                batcher = _delta_batchers[kind] = MicroBatcher(
+                    partial(_run_delta_batch, kind), config.delta_batch_size, config.delta_batch_wait
+                )
+    return batcher
+
+
+def reset_delta_batchers():
+    # Picks up a changed delta_batch_size / delta_batch_wait on the next request
+    with _delta_batchers_lock:
+        _delta_batchers.clear()
+
+
+def _infer_batched(kind: str, interaction: str) -> Optional[Dict[str, float]]:
+    # Deltas from a call shared with other sessions' requests, or None while batching is off
+    batcher = get_delta_batcher(kind)
+    if batcher is None:
+        return None
+    current_span().set(batched=True)
+    cache_key = delta_cache_key(kind, interaction, batched=True)
+    cached = get_delta_cache().get(cache_key)
+    if cached is not None:
+        current_span().set(cache_hit=True)
+        return cached
+    delta_dict = dict(batcher.submit(interaction))
+    get_delta_cache().set(cache_key, delta_dict)
+    return delta_dict
+
+
+def format_memory_list(memories: Optional[List[Memory]]) -> str:
+    if not memories:
+        return "None"
+    return " | ".join(memory.content for memory in memories)
 
 
-    
 def apply_emotional_delta(state: EmotionalState, delta: EmotionalStateDelta) -> EmotionalState:
-    new_variables = []
-    for var in state.variables:
-        new_value = var.value + delta.variable_deltas.get(var.name, 0)
-        new_variables.append(LatentVariable(var.name, new_value))
-    return EmotionalState(new_variables)
+    return state.apply(delta.variable_deltas)
 
 
 def apply_physical_delta(state: PhysicalState, delta: PhysicalStateDelta) -> PhysicalState:
-    new_variables = []
-    for var in state.variables:
-        new_value = var.value + delta.variable_deltas.get(var.name, 0)
-        new_variables.append(LatentVariable(var.name, new_value))
-    return PhysicalState(variables=new_variables, description=state.description)
+    return state.apply(delta.variable_deltas)
 
 
+@traced("updater.emotional_delta")
 def process_interaction_to_emotional_delta(interaction: str) -> EmotionalStateDelta:
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    system_message = EMOTIONAL_DELTA_SYSTEM_MESSAGE
+    expected_keys = EMOTIONAL_VARIABLES
 
-    system_message = """
-    You are an AI assistant that interprets interactions with a virtual pet and outputs emotional changes.
-    The pet has 5 emotional states: happiness, excitement, calmness, curiosity, and affection.
-    Each state can change between -10 and 10 based on the interaction, or remain unchanged (0).
-    Output a JSON object with the changes for each emotional state.
-    If a state is unaffected by the interaction, set its value to 0.
-    Your response should be a valid JSON object.
-    """
+    cache_key = delta_cache_key("emotional", interaction)
+    cached = get_delta_cache().get(cache_key)
+    if cached is not None:
+        current_span().set(cache_hit=True)
+        return EmotionalStateDelta(variable_deltas=cached)
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Use the appropriate model
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": f"Interpret this interaction with the virtual pet: {interaction}"}
-            ]
+        delta_dict = _infer_batched("emotional", interaction)
+        if delta_dict is not None:
+            return EmotionalStateDelta(variable_deltas=delta_dict)
+
+        response = create_json_completion(
+            system_message,
+            delta_user_message(interaction),
+            task="emotional_delta"
         )
 
         # Check if the response was cut off
-        if response.choices[0].finish_reason == "length":
+        if response.finish_reason == "length":
             raise ValueError("Response was cut off. Try a shorter interaction or increase max_tokens.")
 
-        # Parse the JSON response
-        delta_dict = json.loads(response.choices[0].message.content)
+        # Parse the JSON response; only validated deltas may reach the (persistent) cache
+        delta_dict = parse_delta_content(response.content, expected_keys)
 
-        # Ensure all expected keys are present
-        expected_keys = ["happiness", "excitement", "calmness", "curiosity", "affection"]
-        for key in expected_keys:
-            if key not in delta_dict:
-                delta_dict[key] = 0.0  # Default to no change if missing
+        get_delta_cache().set(cache_key, delta_dict)
 
         # Create and return the EmotionalStateDelta
         return EmotionalStateDelta(variable_deltas=delta_dict)
 
-    except json.JSONDecodeError:
+    except json.JSONDecodeError as e:
+        record_error(e)
         print("Error: Invalid JSON response from API")
-        return EmotionalStateDelta(variable_deltas={key: 0.0 for key in expected_keys})
+        # Estimate from keywords rather than leaving the pet unaffected
+        return fallback_emotional_delta(interaction)
     except Exception as e:
+        record_error(e)
         print(f"An error occurred: {str(e)}")
-        return EmotionalStateDelta(variable_deltas={key: 0.0 for key in expected_keys})
+        return fallback_emotional_delta(interaction)
 
 
+@traced("updater.physical_delta")
 def process_interaction_to_physical_delta(interaction: str) -> PhysicalStateDelta:
-    load_dotenv()
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    system_message = PHYSICAL_DELTA_SYSTEM_MESSAGE
+    expected_keys = PHYSICAL_VARIABLES
 
-    system_message = """
-    You are an AI assistant that interprets interactions with a virtual pet and outputs physical state changes.
-    The pet has 4 physical states: hunger, tiredness, health, and cleanliness.
-    Each state can change between -10 and 10 based on the interaction, or remain unchanged (0).
-    Output a JSON object with the changes for each physical state.
-    If a state is unaffected by the interaction, set its value to 0.
-    Your response should be a valid JSON object.
-    """
+    cache_key = delta_cache_key("physical", interaction)
+    cached = get_delta_cache().get(cache_key)
+    if cached is not None:
+        current_span().set(cache_hit=True)
+        return PhysicalStateDelta(variable_deltas=cached)
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Use the appropriate model
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": f"Interpret this interaction with the virtual pet: {interaction}"}
-            ]
+        delta_dict = _infer_batched("physical", interaction)
+        if delta_dict is not None:
+            return PhysicalStateDelta(variable_deltas=delta_dict)
+
+        response = create_json_completion(
+            system_message,
+            delta_user_message(interaction),
+            task="physical_delta"
         )
 
-        if response.choices[0].finish_reason == "length":
+        if response.finish_reason == "length":
             raise ValueError("Response was cut off. Try a shorter interaction or increase max_tokens.")
 
-        delta_dict = json.loads(response.choices[0].message.content)
-
-        expected_keys = ["hunger", "tiredness", "health", "cleanliness"]
-        for key in expected_keys:
-            if key not in delta_dict:
-                delta_dict[key] = 0.0  # Default to no change if missing
+        delta_dict = parse_delta_content(response.content, expected_keys)
 
+        get_delta_cache().set(cache_key, delta_dict)
         return PhysicalStateDelta(variable_deltas=delta_dict)
 
-    except json.JSONDecodeError:
+    except json.JSONDecodeError as e:
+        record_error(e)
         print("Error: Invalid JSON response from API")
-        return PhysicalStateDelta(variable_deltas={key: 0.0 for key in expected_keys})
+        return fallback_physical_delta(interaction)
     except Exception as e:
+        record_error(e)
         print(f"An error occurred: {str(e)}")
-        return PhysicalStateDelta(variable_deltas={key: 0.0 for key in expected_keys})
+        return fallback_physical_delta(interaction)
 
+@traced("updater.memory")
 def process_interaction_as_pet_memory(
     interaction: str,
     initial_emotional_state: EmotionalState,
@@ -122,9 +275,6 @@ def process_interaction_as_pet_memory(
     emotional_delta: EmotionalStateDelta,
     physical_delta: PhysicalStateDelta
 ) -> Memory:
-    load_dotenv()
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
     system_message = """
     You are an AI assistant that generates subjective memories for a virtual pet based on interactions and state changes.
     Create a short, first-person memory from the pet's perspective, reflecting the interaction and how it made the pet feel.
@@ -134,29 +284,24 @@ def process_interaction_as_pet_memory(
     The 'memory' field should contain the generated memory text, and the 'importance' field should be a float between 0 and 1.
     """
 
-
     # Prepare the input for the AI
-    pet_state_info = f"""
-    Initial Emotional State: {initial_emotional_state}
-    Initial Physical State: {initial_physical_state}
-    Emotional Changes: {emotional_delta.variable_deltas}
-    Physical Changes: {physical_delta.variable_deltas}
-    """
+    user_message = (
+        PromptBuilder("memory")
+        .add("Interaction", truncate_tokens(interaction, MAX_INTERACTION_TOKENS))
+        .add("Initial Emotional State", encode_emotional_state(initial_emotional_state))
+        .add("Initial Physical State", encode_physical_state(initial_physical_state))
+        .add("Emotional Changes", encode_deltas(emotional_delta.variable_deltas))
+        .add("Physical Changes", encode_deltas(physical_delta.variable_deltas))
+        .build()
+    )
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Use the appropriate model
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": f"Interaction: {interaction}\n{pet_state_info}"}
-            ]
-        )
+        response = create_json_completion(system_message, user_message, task="memory")
 
-        if response.choices[0].finish_reason == "length":
+        if response.finish_reason == "length":
             raise ValueError("Response was cut off. Try a shorter interaction or increase max_tokens.")
 
-        memory_data = json.loads(response.choices[0].message.content)
+        memory_data = json.loads(response.content)
         
         # Assuming the AI returns a JSON object with 'memory' and 'importance' fields
         memory_content = memory_data.get('memory', "I remember something happening, but it's fuzzy.")
@@ -164,60 +309,250 @@ def process_interaction_as_pet_memory(
 
         return Memory(content=memory_content, importance=memory_importance)
 
-    except json.JSONDecodeError:
+    except json.JSONDecodeError as e:
+        record_error(e)
         print("Error: Invalid JSON response from API")
         return Memory(content="I'm not sure what happened.", importance=0.1)
     except Exception as e:
+        record_error(e)
         print(f"An error occurred: {str(e)}")
         return Memory(content="Something happened, but I can't quite remember.", importance=0.1)
     
-def process_interaction_for_pet_response(
+def _pet_response_prompt(
     interaction: str,
     initial_emotional_state: EmotionalState,
     initial_physical_state: PhysicalState,
     emotional_delta: EmotionalStateDelta,
     physical_delta: PhysicalStateDelta,
     last_memory: Memory,
-    physical_description: PhysicalDescription
-) -> str:
-    load_dotenv()
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
+    physical_description: PhysicalDescription,
+    relevant_memories: Optional[List[Memory]] = None
+):
     system_message = """
     You are an AI assistant that generates responses for a virtual pet based on interactions, state changes, and context.
     The pet cannot talk, so the response should be a description of the pet's actions, behaviors, and apparent emotions.
-    Use the initial states, changes, last memory, and physical description to create a single sentence that encondes a vivid and engaging response, written with a succint, clear prose without complicated words.
+    Use the initial states, changes, last memory, related memories, and physical description to create a single sentence that encondes a vivid and engaging response, written with a succint, clear prose without complicated words.
     Your response should be a valid JSON object with a single 'response' field containing the pet's reaction as a string.
     """
 
-    pet_context = f"""
-    Physical Description: {physical_description}
-    Initial Emotional State: {initial_emotional_state}
-    Initial Physical State: {initial_physical_state}
-    Emotional Changes: {emotional_delta.variable_deltas}
-    Physical Changes: {physical_delta.variable_deltas}
-    Last Memory: {last_memory.content if last_memory else 'No recent memory'}
-    """
+    user_message = (
+        PromptBuilder("response")
+        .add("Interaction", truncate_tokens(interaction, MAX_INTERACTION_TOKENS))
+        .add("Physical Description", encode_description(physical_description))
+        .add("Initial Emotional State", encode_emotional_state(initial_emotional_state))
+        .add("Initial Physical State", encode_physical_state(initial_physical_state))
+        .add("Emotional Changes", encode_deltas(emotional_delta.variable_deltas))
+        .add("Physical Changes", encode_deltas(physical_delta.variable_deltas))
+        .add("Last Memory", last_memory.content if last_memory else 'No recent memory', priority=1)
+        .add("Related Memories", format_memory_list(relevant_memories), priority=0)
+        .build()
+    )
+
+    return system_message, user_message
+
+@traced("updater.response")
+def process_interaction_for_pet_response(
+    interaction: str,
+    initial_emotional_state: EmotionalState,
+    initial_physical_state: PhysicalState,
+    emotional_delta: EmotionalStateDelta,
+    physical_delta: PhysicalStateDelta,
+    last_memory: Memory,
+    physical_description: PhysicalDescription,
+    relevant_memories: Optional[List[Memory]] = None
+) -> str:
+    system_message, user_message = _pet_response_prompt(
+        interaction, initial_emotional_state, initial_physical_state,
+        emotional_delta, physical_delta, last_memory, physical_description, relevant_memories
+    )
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Use the appropriate model
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": f"Interaction: {interaction}\n{pet_context}"}
-            ]
-        )
+        response = create_json_completion(system_message, user_message, task="response")
 
-        if response.choices[0].finish_reason == "length":
+        if response.finish_reason == "length":
             raise ValueError("Response was cut off. Try a shorter interaction or increase max_tokens.")
 
-        response_data = json.loads(response.choices[0].message.content)
+        response_data = json.loads(response.content)
         return response_data.get('response', "The pet reacts, but it's unclear how.")
 
-    except json.JSONDecodeError:
+    except json.JSONDecodeError as e:
+        record_error(e)
         print("Error: Invalid JSON response from API")
         return "The pet seems confused by what just happened."
     except Exception as e:
+        record_error(e)
+        print(f"An error occurred: {str(e)}")
+        return "The pet's reaction is hard to interpret."
+
+def stream_interaction_for_pet_response(
+    interaction: str,
+    initial_emotional_state: EmotionalState,
+    initial_physical_state: PhysicalState,
+    emotional_delta: EmotionalStateDelta,
+    physical_delta: PhysicalStateDelta,
+    last_memory: Memory,
+    physical_description: PhysicalDescription,
+    relevant_memories: Optional[List[Memory]] = None
+) -> Generator[str, None, str]:
+    # Streaming variant of process_interaction_for_pet_response: yields the response text
+    # as it arrives and returns the full response
+    system_message, user_message = _pet_response_prompt(
+        interaction, initial_emotional_state, initial_physical_state,
+        emotional_delta, physical_delta, last_memory, physical_description, relevant_memories
+    )
+
+    streamed = []
+    try:
+        pieces = stream_json_field(stream_json_completion(system_message, user_message, task="response"), "response")
+        for piece in pieces:
+            streamed.append(piece)
+            yield piece
+    except Exception as e:
+        record_error(e)
         print(f"An error occurred: {str(e)}")
-        return "The pet's reaction is hard to interpret."
\ No newline at end of file
+        if not streamed:
+            fallback = "The pet's reaction is hard to interpret."
+            yield fallback
+            return fallback
+
+    if not streamed:
+        fallback = "The pet reacts, but it's unclear how."
+        yield fallback
+        return fallback
+    return "".join(streamed)
+
+
+@dataclass
+class InteractionAnalysis:
+    emotional_delta: EmotionalStateDelta
+    physical_delta: PhysicalStateDelta
+    memory: Memory
+    response: str
+
+
+def _delta_schema(keys) -> dict:
+    return {
+        "type": "object",
+        "properties": {key: {"type": "number"} for key in keys},
+        "required": list(keys),
+        "additionalProperties": False
+    }
+
+
+INTERACTION_ANALYSIS_SCHEMA = {
+    "name": "interaction_analysis",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "emotional_changes": _delta_schema(EMOTIONAL_VARIABLES),
+            "physical_changes": _delta_schema(PHYSICAL_VARIABLES),
+            "memory": {"type": "string"},
+            "importance": {"type": "number"},
+            "response": {"type": "string"}
+        },
+        "required": ["emotional_changes", "physical_changes", "memory", "importance", "response"],
+        "additionalProperties": False
+    }
+}
+
+
+def parse_delta_content(content: str, keys) -> dict:
+    changes = json.loads(content)
+    if not isinstance(changes, dict):
+        raise ValueError(f"Expected a JSON object of changes, got {type(changes).__name__}")
+    # A state the model left out is unchanged; unknown keys are dropped
+    return _validate_deltas({key: changes.get(key, 0.0) for key in keys}, keys)
+
+
+def _validate_deltas(changes: dict, keys) -> dict:
+    deltas = {}
+    for key in keys:
+        value = changes.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not -10 <= value <= 10:
+            raise ValueError(f"Invalid change for {key}: {value!r}")
+        deltas[key] = float(value)
+    return deltas
+
+
+def parse_interaction_analysis(data: dict) -> InteractionAnalysis:
+    emotional_deltas = _validate_deltas(data["emotional_changes"], EMOTIONAL_VARIABLES)
+    physical_deltas = _validate_deltas(data["physical_changes"], PHYSICAL_VARIABLES)
+
+    memory_content = data["memory"]
+    importance = data["importance"]
+    response = data["response"]
+    if not isinstance(memory_content, str) or not memory_content.strip():
+        raise ValueError("Missing memory text")
+    if isinstance(importance, bool) or not isinstance(importance, (int, float)) or not 0 <= importance <= 1:
+        raise ValueError(f"Invalid importance: {importance!r}")
+    if not isinstance(response, str) or not response.strip():
+        raise ValueError("Missing pet response")
+
+    return InteractionAnalysis(
+        emotional_delta=EmotionalStateDelta(variable_deltas=emotional_deltas),
+        physical_delta=PhysicalStateDelta(variable_deltas=physical_deltas),
+        memory=Memory(content=memory_content, importance=float(importance)),
+        response=response
+    )
+
+
+@traced("updater.analysis")
+def process_interaction_fused(
+    interaction: str,
+    initial_emotional_state: EmotionalState,
+    initial_physical_state: PhysicalState,
+    last_memory: Optional[Memory],
+    physical_description: PhysicalDescription,
+    relevant_memories: Optional[List[Memory]] = None
+) -> Optional[InteractionAnalysis]:
+    # Single structured-output call covering both deltas, the memory and the response.
+    # Returns None when the call fails or the output does not validate, so callers can
+    # fall back to the multi-call path.
+    system_message = """
+    You are an AI assistant that interprets interactions with a virtual pet.
+    From one interaction, produce all of the following:
+    - 'emotional_changes': changes for happiness, excitement, calmness, curiosity, and affection.
+    - 'physical_changes': changes for hunger, tiredness, health, and cleanliness.
+      Each change is a number between -10 and 10, or 0 if the state is unaffected.
+    - 'memory': a short, single-sentence first-person memory from the pet's perspective, in simple language,
+      reflecting the interaction and how it made the pet feel.
+    - 'importance': how important that memory is to the pet, a float between 0 and 1.
+    - 'response': a single sentence describing the pet's actions, behaviors, and apparent emotions.
+      The pet cannot talk. Use succint, clear prose without complicated words.
+    Use the current states, last memory, related memories, and physical description to inform the changes and the reaction.
+    Your response should be a valid JSON object.
+    """
+
+    user_message = (
+        PromptBuilder("analysis")
+        .add("Interaction", truncate_tokens(interaction, MAX_INTERACTION_TOKENS))
+        .add("Physical Description", encode_description(physical_description))
+        .add("Current Emotional State", encode_emotional_state(initial_emotional_state))
+        .add("Current Physical State", encode_physical_state(initial_physical_state))
+        .add("Last Memory", last_memory.content if last_memory else 'No recent memory', priority=1)
+        .add("Related Memories", format_memory_list(relevant_memories), priority=0)
+        .build()
+    )
+
+    try:
+        response = create_json_completion(
+            system_message,
+            user_message,
+            response_format={"type": "json_schema", "json_schema": INTERACTION_ANALYSIS_SCHEMA},
+            task="analysis"
+        )
+
+        if response.finish_reason == "length":
+            raise ValueError("Response was cut off. Try a shorter interaction or increase max_tokens.")
+
+        return parse_interaction_analysis(json.loads(response.content))
+
+    except json.JSONDecodeError as e:
+        record_error(e)
+        print("Error: Invalid JSON response from API")
+        return None
+    except Exception as e:
+        record_error(e)
+        print(f"Fused interaction analysis failed, falling back to separate calls: {str(e)}")
+        return None
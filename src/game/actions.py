@@ -0,0 +1,128 @@
+# src/game/actions.py
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.core.memory import Memory
+from src.core.pet import Pet, TurnRecord
+from src.core.states import EmotionalStateDelta, PhysicalStateDelta, EMOTIONAL_VARIABLES, PHYSICAL_VARIABLES
+
+ACTIONS_PATH = Path(__file__).resolve().parents[2] / "data" / "actions.json"
+
+@dataclass
+class ActionDefinition:
+    # A canonical scenario action whose outcome is known ahead of time, so it needs no LLM calls.
+    # Text templates may use {name} and {species}.
+    id: str
+    interaction: str
+    emotional_delta: EmotionalStateDelta
+    physical_delta: PhysicalStateDelta
+    memory_templates: Tuple[str, ...]
+    memory_importance: float
+    response_templates: Tuple[str, ...]
+
+    def turn(self, pet: Pet, rng: random.Random = random) -> TurnRecord:
+        fields = {"name": pet.name, "species": pet.physical_state.description.species}
+        return TurnRecord(
+            timestamp=time.time(),
+            emotional_delta=self.emotional_delta,
+            physical_delta=self.physical_delta,
+            interaction=self.interaction.format(**fields),
+            memory=Memory(content=rng.choice(self.memory_templates).format(**fields), importance=self.memory_importance),
+            response=rng.choice(self.response_templates).format(**fields)
+        )
+
+def _parse_action(data: dict) -> ActionDefinition:
+    # Deltas are validated and filled in once at load time rather than on every turn
+    emotional = data.get("emotional_changes", {})
+    physical = data.get("physical_changes", {})
+    unknown = (set(emotional) - set(EMOTIONAL_VARIABLES)) | (set(physical) - set(PHYSICAL_VARIABLES))
+    if unknown:
+        raise ValueError(f"Action {data['id']} changes unknown variables: {sorted(unknown)}")
+    memory = data.get("memory", {})
+    return ActionDefinition(
+        id=data["id"],
+        interaction=data.get("interaction", data["id"].replace("_", " ")),
+        emotional_delta=EmotionalStateDelta({key: float(emotional.get(key, 0)) for key in EMOTIONAL_VARIABLES}),
+        physical_delta=PhysicalStateDelta({key: float(physical.get(key, 0)) for key in PHYSICAL_VARIABLES}),
+        memory_templates=tuple(memory.get("templates") or ["Something familiar happened with my human."]),
+        memory_importance=float(memory.get("importance", 0.5)),
+        response_templates=tuple(data.get("responses") or ["{name} reacts happily."])
+    )
+
+def load_actions(file_path: str) -> List[ActionDefinition]:
+    with open(file_path, 'r') as f:
+        actions_data = json.load(f)
+    return [_parse_action(action) for action in actions_data]
+
+class ActionRegistry:
+    # Known action ids, reloaded when the file's mtime changes. A missing file means no known
+    # actions, so every choice goes through the model.
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = str(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._last_check = 0.0
+        self._actions: Dict[str, ActionDefinition] = {}
+        self._load()
+
+    @property
+    def ids(self) -> List[str]:
+        self._maybe_reload()
+        return list(self._actions)
+
+    def get(self, action_id: str) -> Optional[ActionDefinition]:
+        self._maybe_reload()
+        return self._actions.get(action_id)
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            if self._current_mtime() != self._mtime:
+                self._load_locked()
+
+    def _load(self):
+        with self._lock:
+            self._last_check = time.monotonic()
+            self._load_locked()
+
+    def _load_locked(self):
+        mtime = self._current_mtime()
+        actions = load_actions(self.path) if mtime is not None else []
+        self._actions = {action.id: action for action in actions}
+        self._mtime = mtime
+
+
+_registry: Optional[ActionRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_action_registry() -> ActionRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ActionRegistry(ACTIONS_PATH)
+    return _registry
+
+def set_action_registry(registry: Optional[ActionRegistry]):
+    global _registry
+    with _registry_lock:
+        _registry = registry
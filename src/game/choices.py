@@ -1,16 +1,28 @@
 # src/game/choices.py
 from dataclasses import dataclass
-from typing import Callable
+from typing import Optional
+
+# What a choice does is data (an action type plus a payload) that Game.dispatch_choice acts on,
+# so scenarios and games can be pickled, spilled to disk and moved between processes
+INTERACT = "interact"  # payload is the interaction played on the pet, e.g. a known action id
+FREEFORM = "freeform"  # the player's own message is the interaction
+NOOP = "noop"          # nothing happens to the pet; the story just moves on
+ACTION_TYPES = (INTERACT, FREEFORM, NOOP)
 
 @dataclass
 class ScenarioChoice:
     text: str
-    action: Callable[['Game', str], None]
+    action_type: str = INTERACT
+    payload: Optional[str] = None
+
+    def __post_init__(self):
+        if self.action_type not in ACTION_TYPES:
+            raise ValueError(f"Unknown choice action type: {self.action_type}")
 
     def execute(self, game: 'Game', message: str):
-        self.action(game, message)
+        game.dispatch_choice(self.action_type, self.payload, message)
 
 @dataclass
 class FreeformChoice:
     def execute(self, game: 'Game', message: str):
-        game.process_freeform_action(message)
+        game.dispatch_choice(FREEFORM, None, message)
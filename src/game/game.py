@@ -1,20 +1,58 @@
 
 # src/game/game.py
-from typing import List, Dict, Optional, Union
+import copy
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator, List, Dict, Optional, Union
+from src.core.persistence import PetStore
 from src.core.pet import Pet
+from src.core.ticks import DecayEngine
+from .actions import ActionDefinition, get_action_registry
 from .scenario import Scenario, generate_dynamic_scenario
-from .choices import ScenarioChoice, FreeformChoice
+from .choices import FREEFORM, INTERACT, NOOP, ScenarioChoice, FreeformChoice
 from src.utils.formatters import format_pet_state, format_pet_memories
+from src.utils.tracing import span
+
+# Speculative turns from every game share this pool, which caps how many are in flight per process
+_speculation_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="game-prefetch")
 
 class Game:
-    def __init__(self, pet: Pet, initial_scenario: Scenario):
+    def __init__(self, pet: Pet, initial_scenario: Scenario, prefetch: bool = False, max_speculative: int = 4,
+                 decay_engine: Optional[DecayEngine] = None, store: Optional[PetStore] = None,
+                 pet_id: Optional[str] = None):
         self.pet = pet
         self.current_scenario = initial_scenario
         self.previous_scenario: Optional[Scenario] = None
         self.last_interaction: Optional[str] = None
         self.last_pet_response: Optional[str] = None
+        # While the player decides, play each listed choice ahead on a copy of the pet
+        self.prefetch = prefetch
+        self.max_speculative = max_speculative
+        self._speculations: Dict[int, Future] = {}
+        # Catches the pet up on time-based decay whenever the player touches it
+        self.decay_engine = decay_engine
+        # Every change to the pet is journaled here when a store is attached
+        self.store = store
+        self.pet_id = pet_id
+        if self.store is not None:
+            if self.pet_id is None:
+                raise ValueError("A pet_id is required to persist the pet")
+            if not self.store.exists(self.pet_id):
+                self.store.save(self.pet_id, self.pet)
+        # Set while process_message_stream runs; receives (kind, text) chunks
+        self._stream_sink: Optional[Callable[[str, str], None]] = None
+        if self.prefetch:
+            self.start_prefetch()
+
+    def __reduce__(self):
+        # Pickles (and copies) through the game serializer. The store and any in-flight speculative
+        # turns belong to this process and are left behind; attach a store again after loading.
+        from .serialization import game_from_dict, game_to_dict
+        return game_from_dict, (game_to_dict(self), self.decay_engine)
 
     def process_message(self, message: str) -> dict:
+        self.advance_time()
         if message == "state":
             return {"special_action": "show_state", "content": format_pet_state(self.pet)}
         elif message == "memories":
@@ -28,9 +66,41 @@ class Game:
                 return self.execute_choice(FreeformChoice(), "")
         return self.execute_choice(FreeformChoice(), message)
 
+    def process_message_stream(self, message: str) -> Iterator[dict]:
+        # Same as process_message, but yields {"type": "pet_response" | "scenario", "text": ...} events
+        # while the pet response and the next scenario description are generated, and finally
+        # {"type": "result", "result": <process_message result>}
+        events: "queue.Queue[dict]" = queue.Queue()
+
+        def run():
+            try:
+                events.put({"type": "result", "result": self.process_message(message)})
+            except Exception as e:
+                events.put({"type": "error", "error": e})
+            finally:
+                self._stream_sink = None
+
+        self._stream_sink = lambda kind, text: events.put({"type": kind, "text": text})
+        threading.Thread(target=run, daemon=True).start()
+        while True:
+            event = events.get()
+            if event["type"] == "error":
+                raise event["error"]
+            yield event
+            if event["type"] == "result":
+                return
+
     def execute_choice(self, choice: Union[ScenarioChoice, FreeformChoice], message: str) -> dict:
-        choice.execute(self, message)
-        self.generate_next_scenario()
+        with span("game.execute_choice", freeform=isinstance(choice, FreeformChoice)) as choice_span:
+            speculation = self._take_speculation(choice, message)
+            choice_span.set(speculative_hit=speculation is not None)
+            if speculation is not None:
+                self._adopt(speculation)
+            else:
+                choice.execute(self, message)
+                self.generate_next_scenario()
+        if self.prefetch:
+            self.start_prefetch()
         return {
             "scenario": self.current_scenario.description,
             "choices": [choice.text for choice in self.current_scenario.choices],
@@ -38,18 +108,105 @@ class Game:
             "pet_response": self.last_pet_response
         }
 
+    def dispatch_choice(self, action_type: str, payload: Optional[str], message: str):
+        if action_type == INTERACT:
+            self.update_pet(payload)
+        elif action_type == FREEFORM:
+            self.process_freeform_action(message)
+        elif action_type != NOOP:
+            raise ValueError(f"Unknown choice action type: {action_type}")
+
+    def advance_time(self):
+        if self.decay_engine is not None:
+            tick = self.decay_engine.advance(self.pet)
+            if tick is not None and self.store is not None:
+                self.store.append(self.pet_id, tick)
+
     def update_pet(self, interaction: str):
+        action = get_action_registry().get(interaction)
+        if action is not None:
+            self.perform_action(action)
+            return
         self.last_interaction = interaction
-        self.last_pet_response = self.pet.process_interaction(interaction)
+        sink = self._stream_sink
+        self.last_pet_response = self.pet.process_interaction(
+            interaction,
+            on_response_chunk=(lambda text: sink("pet_response", text)) if sink else None
+        )
+        if self.store is not None:
+            self.store.append(self.pet_id, self.pet.last_turn)
+
+    def perform_action(self, action: ActionDefinition):
+        # Known actions have precomputed outcomes, so the turn needs no LLM calls
+        with span("game.perform_action", action=action.id):
+            turn = action.turn(self.pet)
+            self.pet.last_turn = turn
+            self.pet.apply_turn(turn)
+        self.last_interaction = turn.interaction
+        self.last_pet_response = turn.response
+        if self._stream_sink is not None:
+            self._stream_sink("pet_response", turn.response)
+        if self.store is not None:
+            self.store.append(self.pet_id, turn)
 
     def process_freeform_action(self, action: str):
         self.update_pet(action)
 
     def generate_next_scenario(self):
+        sink = self._stream_sink
         self.previous_scenario = self.current_scenario
-        self.current_scenario = generate_dynamic_scenario(
-            self.pet,
-            self.previous_scenario,
-            self.last_interaction,
-            self.last_pet_response
-        )
+        with span("game.generate_next_scenario", streaming=sink is not None) as scenario_span:
+            self.current_scenario = generate_dynamic_scenario(
+                self.pet,
+                self.previous_scenario,
+                self.last_interaction,
+                self.last_pet_response,
+                on_description_chunk=(lambda text: sink("scenario", text)) if sink else None
+            )
+            scenario_span.set(scenario=self.current_scenario.id)
+
+    def start_prefetch(self):
+        self.cancel_prefetch()
+        for choice in self.current_scenario.choices[:self.max_speculative]:
+            # Copy the pet up front so the speculative turn never sees later changes to the real one
+            shadow = Game(copy.deepcopy(self.pet), self.current_scenario)
+            # Whatever turn the speculation leaves here is the one _adopt replays
+            shadow.pet.last_turn = None
+            self._speculations[id(choice)] = _speculation_executor.submit(self._play_ahead, shadow, choice)
+
+    def cancel_prefetch(self):
+        # Queued speculations are dropped; ones already running finish and are discarded
+        for future in self._speculations.values():
+            future.cancel()
+        self._speculations = {}
+
+    @staticmethod
+    def _play_ahead(shadow: 'Game', choice: ScenarioChoice) -> 'Game':
+        shadow.execute_choice(choice, "")
+        return shadow
+
+    def _take_speculation(self, choice: Union[ScenarioChoice, FreeformChoice], message: str) -> Optional['Game']:
+        future = self._speculations.pop(id(choice), None) if not message else None
+        self.cancel_prefetch()
+        if future is None or future.cancelled():
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Speculative turn failed, replaying the choice: {str(e)}")
+            return None
+
+    def _adopt(self, shadow: 'Game'):
+        # The speculative turn is replayed onto the live pet rather than swapping in the shadow pet:
+        # the live pet has already caught up on decay (and journaled it) for this message, while the
+        # shadow was copied before that. Turn records only carry deltas, so the outcome is the same.
+        turn = shadow.pet.last_turn
+        if turn is not None:
+            self.pet.last_turn = turn
+            self.pet.apply_turn(turn)
+            if self.store is not None:
+                self.store.append(self.pet_id, turn)
+        self.previous_scenario = shadow.previous_scenario
+        self.current_scenario = shadow.current_scenario
+        self.last_interaction = shadow.last_interaction
+        self.last_pet_response = shadow.last_pet_response
@@ -1,15 +1,25 @@
 
 # src/game/scenario.py
 from dataclasses import dataclass, field
-from typing import List, Optional
-from .choices import ScenarioChoice
+from bisect import bisect_right
+from pathlib import Path
+from typing import Callable, Dict, Generator, List, Optional
+from .actions import get_action_registry
+from .choices import NOOP, ScenarioChoice
+import os
 import random
 import json
-from openai import OpenAI
-import os
-from dotenv import load_dotenv
+import threading
+import time
+from src.core.llm import create_json_completion, stream_json_completion
+from src.core.prompts import (
+    MAX_INTERACTION_TOKENS, PromptBuilder, compact_lines, encode_pet, estimate_tokens, truncate_tokens
+)
+from src.core.updaters import format_memory_list
+from src.utils.streaming import drain, stream_json_field
+from src.utils.tracing import record_error
 
-load_dotenv()
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
 
 @dataclass
 class Scenario:
@@ -22,96 +32,262 @@ class ScenarioTemplate:
     id: str
     description_template: str
     choice_templates: List[dict]
+    auto_update: Optional[str] = None
 
 @dataclass
 class RandomEvent:
     description: str
     probability: float
 
+def _parse_template(data: dict) -> ScenarioTemplate:
+    if "description_template" in data:
+        return ScenarioTemplate(**data)
+    # data/scenarios.json layout: a fixed description with ready-made choices
+    return ScenarioTemplate(
+        id=data["id"],
+        description_template=data["description"],
+        choice_templates=data.get("choices", []),
+        auto_update=data.get("auto_update")
+    )
+
 def load_scenario_templates(file_path: str) -> List[ScenarioTemplate]:
     with open(file_path, 'r') as f:
         templates_data = json.load(f)
-    return [ScenarioTemplate(**template) for template in templates_data]
+    return [_parse_template(template) for template in templates_data]
 
 def load_random_events(file_path: str) -> List[RandomEvent]:
     with open(file_path, 'r') as f:
         events_data = json.load(f)
     return [RandomEvent(**event) for event in events_data]
 
-def generate_dynamic_scenario(
+class ScenarioRegistry:
+    # Loads scenario templates and random events once, indexes them, and reloads a file only
+    # when its mtime changes. Missing files are treated as empty.
+
+    def __init__(self, template_paths: List[str], random_events_path: Optional[str] = None, check_interval: float = 1.0):
+        self.template_paths = [str(path) for path in template_paths]
+        self.random_events_path = str(random_events_path) if random_events_path else None
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtimes: Dict[str, Optional[float]] = {}
+        self._last_check = 0.0
+        self._templates: List[ScenarioTemplate] = []
+        self._by_id: Dict[str, ScenarioTemplate] = {}
+        self._by_action: Dict[str, List[ScenarioTemplate]] = {}
+        self._events: List[RandomEvent] = []
+        self._event_thresholds: List[float] = []
+        self._load()
+
+    @property
+    def templates(self) -> List[ScenarioTemplate]:
+        self._maybe_reload()
+        return self._templates
+
+    @property
+    def random_events(self) -> List[RandomEvent]:
+        self._maybe_reload()
+        return self._events
+
+    def get(self, template_id: str) -> Optional[ScenarioTemplate]:
+        self._maybe_reload()
+        return self._by_id.get(template_id)
+
+    def templates_for_action(self, action: str) -> List[ScenarioTemplate]:
+        self._maybe_reload()
+        return self._by_action.get(action, [])
+
+    def choose_template(self, rng: random.Random = random) -> ScenarioTemplate:
+        return rng.choice(self.templates)
+
+    def pick_random_event(self, rng: random.Random = random) -> Optional[RandomEvent]:
+        # Same distribution as trying each event in order with its own probability and
+        # stopping at the first hit, but with a single draw against precomputed thresholds
+        self._maybe_reload()
+        events, thresholds = self._events, self._event_thresholds
+        index = bisect_right(thresholds, rng.random())
+        return events[index] if index < len(events) else None
+
+    def _paths(self) -> List[str]:
+        return self.template_paths + ([self.random_events_path] if self.random_events_path else [])
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            if any(self._mtime(path) != self._mtimes.get(path) for path in self._paths()):
+                self._load_locked()
+
+    def _load(self):
+        with self._lock:
+            self._last_check = time.monotonic()
+            self._load_locked()
+
+    def _load_locked(self):
+        mtimes = {path: self._mtime(path) for path in self._paths()}
+
+        templates = []
+        for path in self.template_paths:
+            if mtimes[path] is not None:
+                templates.extend(load_scenario_templates(path))
+
+        events = []
+        if self.random_events_path and mtimes[self.random_events_path] is not None:
+            events = load_random_events(self.random_events_path)
+
+        by_action: Dict[str, List[ScenarioTemplate]] = {}
+        for template in templates:
+            for choice in template.choice_templates:
+                action = choice.get("action")
+                if action and template not in by_action.setdefault(action, []):
+                    by_action[action].append(template)
+
+        thresholds, cumulative, remaining = [], 0.0, 1.0
+        for event in events:
+            cumulative += remaining * event.probability
+            remaining *= 1.0 - event.probability
+            thresholds.append(cumulative)
+
+        # Publish the new snapshot in one go so readers never see a half-built index
+        self._templates, self._events, self._event_thresholds = templates, events, thresholds
+        self._by_id = {template.id: template for template in templates}
+        self._by_action = by_action
+        self._mtimes = mtimes
+
+
+_registry: Optional[ScenarioRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_scenario_registry() -> ScenarioRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ScenarioRegistry(
+                    [DATA_DIR / "scenarios.json", DATA_DIR / "scenario_templates.json"],
+                    DATA_DIR / "random_events.json"
+                )
+    return _registry
+
+def set_scenario_registry(registry: Optional[ScenarioRegistry]):
+    global _registry
+    with _registry_lock:
+        _registry = registry
+
+def _scenario_prompt(
     pet: 'Pet',
     previous_scenario: Optional[Scenario],
     last_interaction: Optional[str],
     last_pet_response: Optional[str]
-) -> Scenario:
-    templates = load_scenario_templates('data/scenario_templates.json')
-    random_events = load_random_events('data/random_events.json')
-    template = random.choice(templates)
+):
+    registry = get_scenario_registry()
+    template = registry.choose_template()
 
     # Check for a random event
-    random_event = None
-    for event in random_events:
-        if random.random() < event.probability:
-            random_event = event
-            break
+    random_event = registry.pick_random_event()
 
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    # Bring back memories that relate to what just happened or to where the story is going
+    memory_query = " ".join(filter(None, [last_interaction, last_pet_response, template.description_template]))
+    relevant_memories = pet.recall(memory_query)
 
-    system_message = f"""
+    system_message = """
     You are an AI assistant that generates dynamic scenarios for a virtual pet game.
-    Use the given template, the pet's current state, previous scenario, last interaction, and pet response to create a unique and engaging scenario.
+    Use the given template, the pet's current state, previous scenario, last interaction, pet response, and memories to create a unique and engaging scenario.
+    Generate a description and choices based on this information.
+    Your response should be a valid JSON object with 'description' and 'choices' fields.
+    The 'choices' field should be a list of objects, each with 'text' and 'action' fields.
+    Incorporate the random event into the scenario if one is present.
+    """
+    # Choices using a known action id are resolved locally, without another model call
+    known_actions = get_action_registry().ids
+    if known_actions:
+        system_message += f"Whenever a choice fits one of these actions, use its id as the 'action': {', '.join(known_actions)}. Otherwise describe the action in a short sentence.\n"
 
-    Pet's current state:
-    {pet.summarize_state()}
+    # Older context is shortened first when the prompt runs over budget
+    context = (
+        PromptBuilder("scenario")
+        .add("Pet's current state", encode_pet(pet))
+        .add("Recent memory", pet.last_memory.content if pet.last_memory else "No recent memories", priority=2)
+        .add("Previous scenario", previous_scenario.description if previous_scenario else "No previous scenario", priority=1)
+        .add("Last interaction", truncate_tokens(last_interaction, MAX_INTERACTION_TOKENS) if last_interaction else "No previous interaction", priority=3)
+        .add("Last pet response", last_pet_response if last_pet_response else "No previous pet response", priority=3)
+        .add("Memories the pet is reminded of", format_memory_list(relevant_memories), priority=0)
+        .add("Random event (if any)", random_event.description if random_event else "No random event")
+        .add("Scenario Template", template.description_template)
+        .build(reserved_tokens=estimate_tokens(compact_lines(system_message)))
+    )
 
-    Previous scenario:
-    {previous_scenario.description if previous_scenario else "No previous scenario"}
+    return template, f"{system_message}\n{context}"
 
-    Last interaction:
-    {last_interaction if last_interaction else "No previous interaction"}
+SCENARIO_USER_MESSAGE = "Generate a scenario based on the given information."
 
-    Last pet response:
-    {last_pet_response if last_pet_response else "No previous pet response"}
+def _build_scenario(template: ScenarioTemplate, scenario_data: dict) -> Scenario:
+    choices = [
+        ScenarioChoice(text=choice['text'], payload=choice['action'])
+        for choice in scenario_data['choices']
+    ]
 
-    Random event (if any):
-    {random_event.description if random_event else "No random event"}
+    return Scenario(
+        id=template.id,
+        description=scenario_data['description'],
+        choices=choices
+    )
 
-    Scenario Template:
-    {template.description_template}
+def _error_scenario(e: Exception) -> Scenario:
+    record_error(e)
+    print(f"An error occurred while generating the scenario: {str(e)}")
+    return Scenario(
+        id="error",
+        description="An error occurred while generating the scenario.",
+        choices=[ScenarioChoice(text="Continue", action_type=NOOP)]
+    )
 
-    Generate a description and choices based on this information.
-    Your response should be a valid JSON object with 'description' and 'choices' fields.
-    The 'choices' field should be a list of objects, each with 'text' and 'action' fields.
-    Incorporate the random event into the scenario if one is present.
-    """
+def generate_dynamic_scenario(
+    pet: 'Pet',
+    previous_scenario: Optional[Scenario],
+    last_interaction: Optional[str],
+    last_pet_response: Optional[str],
+    on_description_chunk: Optional[Callable[[str], None]] = None
+) -> Scenario:
+    if on_description_chunk is not None:
+        return drain(
+            stream_dynamic_scenario(pet, previous_scenario, last_interaction, last_pet_response),
+            on_description_chunk
+        )
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": "Generate a scenario based on the given information."}
-            ]
-        )
+        # Inside the try: a bad template registry must fall back to the error scenario too
+        template, system_message = _scenario_prompt(pet, previous_scenario, last_interaction, last_pet_response)
+        response = create_json_completion(system_message, SCENARIO_USER_MESSAGE, task="scenario")
 
-        scenario_data = json.loads(response.choices[0].message.content)
-        
-        choices = [
-            ScenarioChoice(text=choice['text'], action=lambda game, msg, c=choice['action']: game.update_pet(c))
-            for choice in scenario_data['choices']
-        ]
-
-        return Scenario(
-            id=template.id,
-            description=scenario_data['description'],
-            choices=choices
-        )
+        scenario_data = json.loads(response.content)
+        return _build_scenario(template, scenario_data)
 
     except Exception as e:
-        print(f"An error occurred while generating the scenario: {str(e)}")
-        return Scenario(
-            id="error",
-            description="An error occurred while generating the scenario.",
-            choices=[ScenarioChoice(text="Continue", action=lambda game, msg: None)]
-        )
+        return _error_scenario(e)
+
+def stream_dynamic_scenario(
+    pet: 'Pet',
+    previous_scenario: Optional[Scenario],
+    last_interaction: Optional[str],
+    last_pet_response: Optional[str]
+) -> Generator[str, None, Scenario]:
+    # Yields the scenario description as it is generated, then returns the complete Scenario
+    # once the choices have arrived
+    try:
+        template, system_message = _scenario_prompt(pet, previous_scenario, last_interaction, last_pet_response)
+        raw = yield from stream_json_field(stream_json_completion(system_message, SCENARIO_USER_MESSAGE, task="scenario"), "description")
+        return _build_scenario(template, json.loads(raw))
+
+    except Exception as e:
+        return _error_scenario(e)
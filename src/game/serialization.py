@@ -0,0 +1,88 @@
+# src/game/serialization.py
+import json
+import zlib
+from typing import Optional
+
+from src.core.persistence import PetStore
+from src.core.serialization import pet_from_dict, pet_to_dict
+from src.core.ticks import DecayEngine
+from .choices import ScenarioChoice
+from .game import Game
+from .scenario import Scenario
+
+# Bumped whenever the layout below changes incompatibly
+GAME_FORMAT = 1
+
+
+def choice_to_dict(choice: ScenarioChoice) -> dict:
+    data = {"text": choice.text, "type": choice.action_type}
+    if choice.payload is not None:
+        data["payload"] = choice.payload
+    return data
+
+
+def choice_from_dict(data: dict) -> ScenarioChoice:
+    return ScenarioChoice(text=data["text"], action_type=data["type"], payload=data.get("payload"))
+
+
+def scenario_to_dict(scenario: Scenario) -> dict:
+    return {
+        "id": scenario.id,
+        "description": scenario.description,
+        "choices": [choice_to_dict(choice) for choice in scenario.choices]
+    }
+
+
+def scenario_from_dict(data: dict) -> Scenario:
+    return Scenario(
+        id=data["id"],
+        description=data["description"],
+        choices=[choice_from_dict(choice) for choice in data.get("choices", [])]
+    )
+
+
+def game_to_dict(game: Game) -> dict:
+    return {
+        "format": GAME_FORMAT,
+        "pet": pet_to_dict(game.pet),
+        "pet_id": game.pet_id,
+        "current_scenario": scenario_to_dict(game.current_scenario),
+        "previous_scenario": scenario_to_dict(game.previous_scenario) if game.previous_scenario else None,
+        "last_interaction": game.last_interaction,
+        "last_pet_response": game.last_pet_response,
+        "prefetch": game.prefetch,
+        "max_speculative": game.max_speculative
+    }
+
+
+def game_from_dict(data: dict, decay_engine: Optional[DecayEngine] = None,
+                   store: Optional[PetStore] = None) -> Game:
+    if data.get("format") != GAME_FORMAT:
+        raise ValueError(f"Unsupported game format: {data.get('format')}")
+    # Prefetch starts only once the rest of the game state is back in place
+    game = Game(
+        pet_from_dict(data["pet"]),
+        scenario_from_dict(data["current_scenario"]),
+        max_speculative=data.get("max_speculative", 4),
+        decay_engine=decay_engine,
+        store=store,
+        pet_id=data.get("pet_id")
+    )
+    previous = data.get("previous_scenario")
+    game.previous_scenario = scenario_from_dict(previous) if previous else None
+    game.last_interaction = data.get("last_interaction")
+    game.last_pet_response = data.get("last_pet_response")
+    game.prefetch = data.get("prefetch", False)
+    if game.prefetch:
+        game.start_prefetch()
+    return game
+
+
+def dump_game(game: Game) -> bytes:
+    # Compact form for moving sessions between processes or machines
+    return zlib.compress(json.dumps(game_to_dict(game), separators=(",", ":")).encode("utf-8"), 6)
+
+
+def load_game(payload: bytes, decay_engine: Optional[DecayEngine] = None,
+              store: Optional[PetStore] = None) -> Game:
+    return game_from_dict(json.loads(zlib.decompress(payload).decode("utf-8")), decay_engine, store)
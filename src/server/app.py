@@ -0,0 +1,227 @@
+# src/server/app.py
+import argparse
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from src.utils.formatters import format_pet_state, pet_state_dict
+from src.utils.tracing import MetricsSink, get_tracer
+from .protocol import (
+    ConnectionClosed, ProtocolError, Request, WebSocket,
+    encode_response, read_request, websocket_handshake_response
+)
+from .sessions import Session, SessionNotFound, SessionRegistry
+
+SESSION_PATH = re.compile(r"^/sessions/(?P<id>[0-9a-f]+)(?P<rest>/messages|/ws)?$")
+
+
+def _message_from(body) -> str:
+    # Bodies and WebSocket frames carry {"message": "<text>"}
+    message = body.get("message") if isinstance(body, dict) else None
+    if not isinstance(message, str):
+        raise ValueError("Expected a JSON object with a 'message' string")
+    return message
+
+
+def _session_view(session: Session) -> dict:
+    game = session.game
+    return {
+        "session_id": session.id,
+        "scenario": game.current_scenario.description,
+        "choices": [choice.text for choice in game.current_scenario.choices],
+        "pet_state": format_pet_state(game.pet),
+        "pet": pet_state_dict(game.pet)
+    }
+
+
+class GameServer:
+    # HTTP + WebSocket front end for many Game sessions in one process.
+    #
+    #   POST   /sessions               create a session
+    #   GET    /sessions/<id>          current scenario and pet state (as text and as a structured object)
+    #   DELETE /sessions/<id>          end a session
+    #   POST   /sessions/<id>/messages {"message": ...} -> Game.process_message result
+    #   GET    /sessions/<id>/ws       WebSocket; each text frame is a message, answered with
+    #                                  streamed events from Game.process_message_stream
+    #   GET    /health                 resident and spilled session counts
+    #   GET    /metrics                span latencies, errors and token counts (Prometheus text format)
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080, spill_dir: str = "sessions",
+                 idle_timeout: float = 600.0, eviction_interval: float = 30.0, turn_workers: int = 64,
+                 registry: Optional[SessionRegistry] = None, metrics: bool = True):
+        self.host = host
+        self.port = port
+        self.eviction_interval = eviction_interval
+        # Turns block on LLM calls, so they run on worker threads while the event loop keeps serving
+        self.executor = ThreadPoolExecutor(max_workers=turn_workers, thread_name_prefix="game-turn")
+        self.registry = registry or SessionRegistry(spill_dir, self.executor, idle_timeout=idle_timeout)
+        self._server: Optional[asyncio.AbstractServer] = None
+        # Serving /metrics turns tracing on; reuse a metrics sink if one is configured already
+        self.metrics: Optional[MetricsSink] = None
+        if metrics:
+            tracer = get_tracer()
+            self.metrics = tracer.find_sink(MetricsSink) or tracer.add_sink(MetricsSink())
+        self._evictor: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._evictor = asyncio.ensure_future(self.registry.run_evictor(self.eviction_interval))
+
+    async def stop(self, spill: bool = True):
+        if self._evictor is not None:
+            self._evictor.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if spill:
+            await self.registry.spill_all()
+        self.executor.shutdown(wait=False)
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Serving virtual pets on http://{self.host}:{self.port}")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                if request.wants_websocket:
+                    await self._handle_websocket(request, reader, writer)
+                    break
+                writer.write(await self._dispatch(request))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except ProtocolError as e:
+            writer.write(encode_response(400, {"error": str(e)}, {"Connection": "close"}))
+        except (ConnectionError, ConnectionClosed, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, request: Request) -> bytes:
+        try:
+            if request.path == "/health":
+                return encode_response(200, {
+                    "resident_sessions": len(self.registry.sessions),
+                    "spilled_sessions": self.registry.spilled_count()
+                })
+            if request.path == "/metrics" and self.metrics is not None:
+                return encode_response(200, self.metrics.render(), content_type="text/plain; version=0.0.4")
+            if request.path == "/sessions" and request.method == "POST":
+                session = await self.registry.create()
+                return encode_response(201, _session_view(session))
+
+            match = SESSION_PATH.match(request.path)
+            if match is None:
+                return encode_response(404, {"error": "Not found"})
+            session_id, rest = match.group("id"), match.group("rest")
+
+            if rest is None and request.method == "GET":
+                async with self.registry.acquire(session_id) as session:
+                    return encode_response(200, _session_view(session))
+            if rest is None and request.method == "DELETE":
+                await self.registry.delete(session_id)
+                return encode_response(204)
+            if rest == "/messages" and request.method == "POST":
+                # An unknown session is a 404 whatever the body holds
+                await self.registry.get(session_id)
+                message = _message_from(request.json())
+                return encode_response(200, await self.handle_message(session_id, message))
+            return encode_response(405, {"error": "Method not allowed"})
+
+        except SessionNotFound:
+            return encode_response(404, {"error": "Unknown session"})
+        except ValueError as e:
+            return encode_response(400, {"error": str(e)})
+        except Exception as e:
+            print(f"An error occurred while handling {request.method} {request.path}: {str(e)}")
+            return encode_response(500, {"error": "Internal server error"})
+
+    async def handle_message(self, session_id: str, message: str) -> dict:
+        async with self.registry.acquire(session_id) as session:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, session.game.process_message, message)
+
+    async def _handle_websocket(self, request: Request, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        match = SESSION_PATH.match(request.path)
+        if match is None or match.group("rest") != "/ws":
+            writer.write(encode_response(404, {"error": "Not found"}, {"Connection": "close"}))
+            return
+        session_id = match.group("id")
+        try:
+            await self.registry.get(session_id)
+        except SessionNotFound:
+            writer.write(encode_response(404, {"error": "Unknown session"}, {"Connection": "close"}))
+            return
+
+        writer.write(websocket_handshake_response(request))
+        await writer.drain()
+        ws = WebSocket(reader, writer)
+        while True:
+            text = await ws.receive_text()
+            try:
+                # Frames are either a bare message or {"message": ...}
+                message = _message_from(json.loads(text)) if text.startswith("{") else text
+                await self._stream_message(session_id, message, ws)
+            except ValueError as e:
+                await ws.send_json({"type": "error", "error": str(e)})
+            except SessionNotFound:
+                await ws.send_json({"type": "error", "error": "Unknown session"})
+                await ws.close()
+                return
+
+    async def _stream_message(self, session_id: str, message: str, ws: WebSocket):
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def run(game):
+            try:
+                for event in game.process_message_stream(message):
+                    loop.call_soon_threadsafe(events.put_nowait, event)
+            except Exception as e:
+                loop.call_soon_threadsafe(events.put_nowait, {"type": "error", "error": str(e)})
+
+        async with self.registry.acquire(session_id) as session:
+            turn = loop.run_in_executor(self.executor, run, session.game)
+            while True:
+                event = await events.get()
+                await ws.send_json(event)
+                if event["type"] in ("result", "error"):
+                    break
+            await turn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve many virtual pet sessions over HTTP and WebSocket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--spill-dir", default="sessions", help="Where idle sessions are written")
+    parser.add_argument("--idle-timeout", type=float, default=600.0, help="Seconds before an idle session is spilled")
+    parser.add_argument("--turn-workers", type=int, default=64, help="Threads running blocking game turns")
+    parser.add_argument("--no-metrics", action="store_true", help="Do not trace turns or serve /metrics")
+    args = parser.parse_args()
+
+    server = GameServer(args.host, args.port, args.spill_dir, args.idle_timeout, turn_workers=args.turn_workers,
+                        metrics=not args.no_metrics)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
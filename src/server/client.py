@@ -0,0 +1,71 @@
+# src/server/client.py
+import asyncio
+import json
+from typing import Any, Optional, Tuple
+
+from .app import GameServer
+from .protocol import (
+    ProtocolError, WebSocket, encode_request, new_websocket_key, read_response, websocket_accept
+)
+
+
+class TestClient:
+    # Talks to a GameServer over real sockets. Given a server it also starts and stops it,
+    # which makes it usable for local tests and load scripts:
+    #
+    #     async with TestClient(GameServer(port=0, spill_dir=tmp)) as client:
+    #         status, session = await client.request("POST", "/sessions")
+
+    __test__ = False
+
+    def __init__(self, server: Optional[GameServer] = None, host: str = "127.0.0.1", port: Optional[int] = None):
+        self.server = server
+        self.host = host
+        self.port = port
+
+    async def __aenter__(self) -> "TestClient":
+        if self.server is not None:
+            await self.server.start()
+            self.host, self.port = self.server.host, self.server.port
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.server is not None:
+            await self.server.stop(spill=False)
+
+    async def request(self, method: str, path: str, payload: Any = None) -> Tuple[int, Any]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(encode_request(method, path, f"{self.host}:{self.port}", payload, {"Connection": "close"}))
+            await writer.drain()
+            status, headers, body = await read_response(reader)
+            if not body:
+                return status, None
+            # JSON for the API routes, plain text for /metrics
+            if headers.get("content-type", "").startswith("application/json"):
+                return status, json.loads(body)
+            return status, body.decode("utf-8")
+        finally:
+            writer.close()
+
+    async def send_message(self, session_id: str, message: str) -> dict:
+        status, body = await self.request("POST", f"/sessions/{session_id}/messages", {"message": message})
+        if status != 200:
+            raise ProtocolError(f"Message failed with {status}: {body}")
+        return body
+
+    async def websocket(self, path: str) -> WebSocket:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        key = new_websocket_key()
+        writer.write(encode_request("GET", path, f"{self.host}:{self.port}", headers={
+            "Upgrade": "websocket",
+            "Connection": "Upgrade",
+            "Sec-WebSocket-Key": key,
+            "Sec-WebSocket-Version": "13"
+        }))
+        await writer.drain()
+        status, headers, _ = await read_response(reader)
+        if status != 101 or headers.get("sec-websocket-accept") != websocket_accept(key):
+            writer.close()
+            raise ProtocolError(f"WebSocket upgrade failed with {status}")
+        return WebSocket(reader, writer, client=True)
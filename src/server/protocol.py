@@ -0,0 +1,240 @@
+# src/server/protocol.py
+# Minimal HTTP/1.1 and WebSocket (RFC 6455) framing on top of asyncio streams,
+# enough for JSON requests and text-frame sessions without third-party dependencies.
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+REASONS = {
+    101: "Switching Protocols", 200: "OK", 201: "Created", 204: "No Content",
+    400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+    500: "Internal Server Error"
+}
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    def json(self):
+        return json.loads(self.body) if self.body else {}
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get("connection", "").lower() != "close"
+
+    @property
+    def wants_websocket(self) -> bool:
+        return self.headers.get("upgrade", "").lower() == "websocket"
+
+
+async def _read_head(reader: asyncio.StreamReader) -> Optional[Tuple[str, Dict[str, str]]]:
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise ProtocolError("Connection closed mid-header")
+        return None
+    except asyncio.LimitOverrunError:
+        raise ProtocolError("Header too large")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+
+def _content_length(headers: Dict[str, str]) -> int:
+    value = headers.get("content-length", "0")
+    # int() alone would also take "-5", "+5" and "1_0"
+    if not value.isdecimal() or not value.isascii():
+        raise ProtocolError("Invalid Content-Length")
+    return int(value)
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    head = await _read_head(reader)
+    if head is None:
+        return None
+    start_line, headers = head
+    try:
+        method, path, _ = start_line.split(" ", 2)
+    except ValueError:
+        raise ProtocolError(f"Malformed request line: {start_line!r}")
+    length = _content_length(headers)
+    if length > MAX_BODY_BYTES:
+        raise ProtocolError("Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method=method.upper(), path=path, headers=headers, body=body)
+
+
+async def read_response(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str], bytes]:
+    head = await _read_head(reader)
+    if head is None:
+        raise ConnectionClosed()
+    status_line, headers = head
+    status = int(status_line.split(" ", 2)[1])
+    length = _content_length(headers)
+    body = await reader.readexactly(length) if length else b""
+    return status, headers, body
+
+
+def encode_response(status: int, payload=None, headers: Optional[Dict[str, str]] = None,
+                    content_type: str = "application/json") -> bytes:
+    if payload is None:
+        body = b""
+    elif isinstance(payload, (bytes, str)):
+        body = payload.encode("utf-8") if isinstance(payload, str) else payload
+    else:
+        body = json.dumps(payload).encode("utf-8")
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}"]
+    all_headers = {"Content-Length": str(len(body))}
+    if body:
+        all_headers["Content-Type"] = content_type
+    all_headers.update(headers or {})
+    lines.extend(f"{name}: {value}" for name, value in all_headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def encode_request(method: str, path: str, host: str, payload=None, headers: Optional[Dict[str, str]] = None) -> bytes:
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}", f"Content-Length: {len(body)}"]
+    if body:
+        lines.append("Content-Type: application/json")
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def websocket_accept(key: str) -> str:
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def websocket_handshake_response(request: Request) -> bytes:
+    key = request.headers.get("sec-websocket-key")
+    if not key:
+        raise ProtocolError("Missing Sec-WebSocket-Key")
+    return encode_response(101, headers={
+        "Upgrade": "websocket",
+        "Connection": "Upgrade",
+        "Sec-WebSocket-Accept": websocket_accept(key)
+    })
+
+
+def new_websocket_key() -> str:
+    return base64.b64encode(os.urandom(16)).decode("ascii")
+
+
+def encode_frame(opcode: int, payload: bytes, mask: bool = False) -> bytes:
+    # Servers send unmasked frames; clients must mask theirs
+    length = len(payload)
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack("!H", length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack("!Q", length)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return bytes(header) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[int, bool, bytes]:
+    try:
+        first, second = await reader.readexactly(2)
+        fin, opcode = bool(first & 0x80), first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await reader.readexactly(8))
+        if length > MAX_BODY_BYTES:
+            raise ProtocolError("WebSocket frame too large")
+        key = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise ConnectionClosed()
+    if key:
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return opcode, fin, payload
+
+
+class WebSocket:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, client: bool = False):
+        self.reader = reader
+        self.writer = writer
+        self.client = client
+        self.closed = False
+
+    async def send_text(self, text: str):
+        self.writer.write(encode_frame(OP_TEXT, text.encode("utf-8"), mask=self.client))
+        await self.writer.drain()
+
+    async def send_json(self, payload):
+        await self.send_text(json.dumps(payload))
+
+    async def receive_text(self) -> str:
+        # Answers pings and reassembles fragmented messages; raises ConnectionClosed on close
+        parts = []
+        while True:
+            opcode, fin, payload = await read_frame(self.reader)
+            if opcode == OP_CLOSE:
+                await self.close()
+                raise ConnectionClosed()
+            if opcode == OP_PING:
+                self.writer.write(encode_frame(OP_PONG, payload, mask=self.client))
+                await self.writer.drain()
+                continue
+            if opcode == OP_PONG:
+                continue
+            parts.append(payload)
+            if fin:
+                return b"".join(parts).decode("utf-8")
+
+    async def receive_json(self):
+        return json.loads(await self.receive_text())
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.writer.write(encode_frame(OP_CLOSE, struct.pack("!H", 1000), mask=self.client))
+            await self.writer.drain()
+        except ConnectionError:
+            pass
@@ -0,0 +1,180 @@
+# src/server/sessions.py
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, Optional
+
+from src.core.pet import Pet
+from src.core.ticks import DecayEngine
+from src.game.game import Game
+from src.game.scenario import generate_dynamic_scenario
+from src.game.serialization import game_from_dict, game_to_dict
+
+
+class SessionNotFound(KeyError):
+    pass
+
+
+@dataclass
+class Session:
+    id: str
+    game: Game
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_active: float = field(default_factory=time.monotonic)
+    evicted: bool = False
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+
+def _default_pet_factory() -> Pet:
+    from main import create_initial_pet
+    return create_initial_pet()
+
+
+_decay_engine = DecayEngine()
+
+
+def _new_game(pet: Pet) -> Game:
+    return Game(pet, generate_dynamic_scenario(pet, None, None, None), decay_engine=_decay_engine)
+
+
+def _restore_game(data: dict) -> Game:
+    # The spill format is the game format in src.game.serialization
+    game = game_from_dict(data, decay_engine=_decay_engine)
+    # Time kept passing while the session was on disk
+    game.advance_time()
+    return game
+
+
+class SessionRegistry:
+    # Resident sessions live in memory; sessions idle for longer than idle_timeout are spilled
+    # to spill_dir and transparently restored on their next request. Turns within a session
+    # are serialized by the session lock, while different sessions run concurrently.
+
+    def __init__(self, spill_dir: str, executor: Executor, idle_timeout: float = 600.0,
+                 pet_factory: Callable[[], Pet] = _default_pet_factory):
+        self.spill_dir = spill_dir
+        self.executor = executor
+        self.idle_timeout = idle_timeout
+        self.pet_factory = pet_factory
+        self.sessions: Dict[str, Session] = {}
+        self._restoring: Dict[str, asyncio.Future] = {}
+        os.makedirs(spill_dir, exist_ok=True)
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def _spill_path(self, session_id: str) -> str:
+        return os.path.join(self.spill_dir, f"{session_id}.json")
+
+    async def create(self) -> Session:
+        game = await self._run(lambda: _new_game(self.pet_factory()))
+        session = Session(id=uuid.uuid4().hex, game=game)
+        self.sessions[session.id] = session
+        return session
+
+    async def get(self, session_id: str) -> Session:
+        session = self.sessions.get(session_id)
+        if session is not None:
+            return session
+        # Several requests may arrive for the same spilled session; restore it only once
+        pending = self._restoring.get(session_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._restore(session_id))
+            self._restoring[session_id] = pending
+            pending.add_done_callback(lambda _: self._restoring.pop(session_id, None))
+        return await asyncio.shield(pending)
+
+    async def _restore(self, session_id: str) -> Session:
+        path = self._spill_path(session_id)
+        if not os.path.exists(path):
+            raise SessionNotFound(session_id)
+        game = await self._run(self._load_spilled, path)
+        session = Session(id=session_id, game=game)
+        self.sessions[session_id] = session
+        return session
+
+    @staticmethod
+    def _load_spilled(path: str) -> Game:
+        with open(path, "r") as f:
+            game = _restore_game(json.load(f))
+        os.remove(path)
+        return game
+
+    @asynccontextmanager
+    async def acquire(self, session_id: str) -> AsyncIterator[Session]:
+        # Holds the session lock for one turn; retries if the session was spilled while waiting
+        while True:
+            session = await self.get(session_id)
+            async with session.lock:
+                if session.evicted:
+                    continue
+                session.touch()
+                yield session
+                session.touch()
+                return
+
+    async def delete(self, session_id: str):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            async with session.lock:
+                session.evicted = True
+                session.game.cancel_prefetch()
+        path = self._spill_path(session_id)
+        if os.path.exists(path):
+            os.remove(path)
+        elif session is None:
+            raise SessionNotFound(session_id)
+
+    async def spill(self, session: Session):
+        # Caller must hold session.lock
+        data = game_to_dict(session.game)
+        path = self._spill_path(session.id)
+        await self._run(self._write_json, path, data)
+        session.evicted = True
+        session.game.cancel_prefetch()
+        self.sessions.pop(session.id, None)
+
+    @staticmethod
+    def _write_json(path: str, data: dict):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    async def evict_idle(self) -> int:
+        cutoff = time.monotonic() - self.idle_timeout
+        evicted = 0
+        for session in list(self.sessions.values()):
+            # Sessions mid-turn are busy, not idle
+            if session.last_active > cutoff or session.lock.locked():
+                continue
+            async with session.lock:
+                if session.evicted or session.last_active > cutoff:
+                    continue
+                await self.spill(session)
+                evicted += 1
+        return evicted
+
+    async def run_evictor(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                print(f"Session eviction failed: {str(e)}")
+
+    async def spill_all(self):
+        for session in list(self.sessions.values()):
+            async with session.lock:
+                if not session.evicted:
+                    await self.spill(session)
+
+    def spilled_count(self) -> int:
+        return sum(1 for name in os.listdir(self.spill_dir) if name.endswith(".json"))
@@ -0,0 +1,430 @@
+# src/tools/replay.py
+# Replays archived interactions through the pet model, or prepares provider batch files for them.
+#
+#     python -m src.tools.replay run interactions.jsonl -o results.jsonl --store pets --workers 16
+#     python -m src.tools.replay run interactions.jsonl -o results.jsonl --store pets --resume
+#     python -m src.tools.replay emit-batch interactions.jsonl -o batch_requests/
+#     python -m src.tools.replay import-batch batch_results.jsonl
+#
+# Input lines are JSON objects with "pet_id" and "interaction". Interactions of one pet are
+# processed in file order by a single worker; different pets run concurrently.
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional, Set
+
+from src.core.cache import get_delta_cache
+from src.core.pet import Pet, TurnRecord
+from src.core.persistence import PetStore
+from src.core.prompts import compact_lines
+from src.core.states import EMOTIONAL_VARIABLES, PHYSICAL_VARIABLES
+from src.core.updaters import (
+    EMOTIONAL_DELTA_SYSTEM_MESSAGE, PHYSICAL_DELTA_SYSTEM_MESSAGE, delta_cache_key, delta_user_message,
+    parse_delta_content
+)
+from src.utils.config import get_config
+
+# OpenAI Batch API input files are capped at 50,000 requests
+MAX_BATCH_REQUESTS = 50_000
+
+_DONE = object()
+
+
+@dataclass
+class ReplayRecord:
+    line: int
+    pet_id: str
+    interaction: str
+
+
+@dataclass
+class ReplayStats:
+    processed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+
+def read_records(path: str, skip: Callable[[int], bool] = lambda line: False) -> Iterator[dict]:
+    # Yields {"line": n, ...} for every record, or {"line": n, "error": ...} for lines that do not parse
+    with open(path, "r", encoding="utf-8") as f:
+        for number, text in enumerate(f, 1):
+            if not text.strip() or skip(number):
+                continue
+            try:
+                data = json.loads(text)
+                yield {"line": number, "pet_id": str(data["pet_id"]), "interaction": str(data["interaction"])}
+            except (ValueError, KeyError, TypeError) as e:
+                yield {"line": number, "error": f"Invalid record: {str(e)}"}
+
+
+class Checkpoint:
+    # Highest input line below which every line has been written to the output
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> int:
+        try:
+            with open(self.path, "r") as f:
+                return int(json.load(f)["watermark"])
+        except FileNotFoundError:
+            return 0
+
+    def save(self, watermark: int):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"watermark": watermark, "saved_at": time.time()}, f)
+        os.replace(temporary, self.path)
+
+
+def _completed_lines(output_path: str, watermark: int) -> Set[int]:
+    # Lines past the watermark that already made it to the output before an interruption.
+    # A torn final line is cut off so appending resumes on a clean line boundary.
+    done: Set[int] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb+") as f:
+        valid_end = 0
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            valid_end += len(raw)
+            line = json.loads(raw)["line"]
+            if line > watermark:
+                done.add(line)
+        f.truncate(valid_end)
+    return done
+
+
+class _ResultWriter(threading.Thread):
+    def __init__(self, output_path: str, checkpoint: Optional[Checkpoint], watermark: int,
+                 already_done: Set[int], checkpoint_every: int, stats: ReplayStats):
+        super().__init__(name="replay-writer", daemon=True)
+        self.results: "queue.Queue" = queue.Queue(maxsize=1024)
+        self.output_path = output_path
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.watermark = watermark
+        # Watermark as of the last checkpoint, i.e. what a resume would start from
+        self.durable = watermark
+        # Finished lines past the watermark; the watermark only moves over a contiguous run
+        self.pending = set(already_done)
+        self.stats = stats
+
+    def run(self):
+        with open(self.output_path, "a", encoding="utf-8") as out:
+            since_checkpoint = 0
+            while True:
+                result = self.results.get()
+                if result is _DONE:
+                    break
+                if result.get("blank"):
+                    # Blank input lines produce no output but must not hold the watermark back
+                    self.mark_done(result["line"])
+                    continue
+                out.write(json.dumps(result) + "\n")
+                if "error" in result:
+                    self.stats.failed += 1
+                else:
+                    self.stats.processed += 1
+                self.mark_done(result["line"])
+                since_checkpoint += 1
+                if since_checkpoint >= self.checkpoint_every:
+                    out.flush()
+                    self._save_checkpoint()
+                    since_checkpoint = 0
+            out.flush()
+            self._save_checkpoint()
+
+    def mark_done(self, line: int):
+        self.pending.add(line)
+        while self.watermark + 1 in self.pending:
+            self.watermark += 1
+            self.pending.discard(self.watermark)
+
+    def _save_checkpoint(self):
+        if self.checkpoint is not None:
+            self.checkpoint.save(self.watermark)
+        self.durable = self.watermark
+
+
+class _ReplayWorker(threading.Thread):
+    # Owns every pet whose id hashes to it, so a pet's turns are applied in input order.
+    # The bounded inbox blocks the reader when this worker falls behind.
+
+    def __init__(self, index: int, results: "queue.Queue", pet_factory: Callable[[], Pet],
+                 store: Optional[PetStore], queue_size: int, max_resident: int, source: str,
+                 journaled_through: Dict[str, int], resume_after: Optional[int] = None):
+        super().__init__(name=f"replay-worker-{index}", daemon=True)
+        self.inbox: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.results = results
+        self.pet_factory = pet_factory
+        self.store = store
+        self.max_resident = max_resident
+        self.pets: "OrderedDict[str, Pet]" = OrderedDict()
+        # Journaled turns are tagged "<source><line>"
+        self.source = source
+        # When resuming: input lines past the watermark whose turns a resident pet already journaled
+        self.resume_after = resume_after
+        self.journaled: Dict[str, Dict[int, TurnRecord]] = {}
+        # pet_id -> last input line in its journal, shared with the compactor (see run_replay)
+        self.journaled_through = journaled_through
+
+    def _pet(self, pet_id: str) -> Pet:
+        pet = self.pets.get(pet_id)
+        if pet is not None:
+            self.pets.move_to_end(pet_id)
+            return pet
+        pet = self.store.load(pet_id) if self.store is not None else None
+        if pet is None:
+            pet = self.pet_factory()
+            if self.store is not None:
+                self.store.save(pet_id, pet)
+        elif self.resume_after is not None:
+            self.journaled[pet_id] = lines = self._journaled_lines(pet_id)
+            if lines:
+                self.journaled_through[pet_id] = max(self.journaled_through.get(pet_id, 0), max(lines))
+        self.pets[pet_id] = pet
+        # Without a store the only copy of a pet is the resident one, so nothing can be evicted
+        if self.store is not None and len(self.pets) > self.max_resident:
+            evicted, _ = self.pets.popitem(last=False)
+            self.journaled.pop(evicted, None)
+        return pet
+
+    def _journaled_lines(self, pet_id: str) -> Dict[int, TurnRecord]:
+        # Turns an interrupted run journaled but may not have written to the output
+        lines = {}
+        for turn in self.store.turns(pet_id):
+            if turn.source is not None and turn.source.startswith(self.source):
+                line = int(turn.source[len(self.source):])
+                if line > self.resume_after:
+                    lines[line] = turn
+        return lines
+
+    def run(self):
+        while True:
+            record = self.inbox.get()
+            if record is _DONE:
+                return
+            started = time.perf_counter()
+            try:
+                pet = self._pet(record.pet_id)
+                turn = self.journaled.get(record.pet_id, {}).pop(record.line, None)
+                if turn is None:
+                    pet.process_interaction(record.interaction)
+                    turn = pet.last_turn
+                    if self.store is not None:
+                        turn.source = f"{self.source}{record.line}"
+                        self.store.append(record.pet_id, turn)
+                        self.journaled_through[record.pet_id] = record.line
+                self.results.put({
+                    "line": record.line,
+                    "pet_id": record.pet_id,
+                    "interaction": record.interaction,
+                    "response": turn.response,
+                    "emotional_delta": turn.emotional_delta.variable_deltas,
+                    "physical_delta": turn.physical_delta.variable_deltas,
+                    "memory": {"content": turn.memory.content, "importance": turn.memory.importance},
+                    "elapsed": time.perf_counter() - started
+                })
+            except Exception as e:
+                print(f"An error occurred while replaying line {record.line}: {str(e)}")
+                self.results.put({"line": record.line, "pet_id": record.pet_id, "error": str(e)})
+
+
+def _shard(pet_id: str, shards: int) -> int:
+    # Stable across runs, unlike hash(), so a resumed replay routes pets the same way
+    return zlib.crc32(pet_id.encode("utf-8")) % shards
+
+
+def run_replay(input_path: str, output_path: str, pet_factory: Callable[[], Pet], workers: int = 8,
+               queue_size: int = 32, store_dir: Optional[str] = None, max_resident: int = 1024,
+               checkpoint_path: Optional[str] = None, resume: bool = False,
+               checkpoint_every: int = 100) -> ReplayStats:
+    # Output is written as turns finish, so lines may be out of input order; each carries its "line".
+    # With a store, pets are journaled and only max_resident per worker stay in memory; without
+    # one every pet stays resident, and a run cannot be resumed.
+    # Journaled turns are tagged with their input line. A turn interrupted between its journal
+    # entry and its output line is not applied again on resume; its output is written from the journal.
+    if resume and not store_dir:
+        raise ValueError("Resuming a replay needs the store it journaled pets to")
+    stats = ReplayStats()
+    started = time.perf_counter()
+    checkpoint = Checkpoint(checkpoint_path or f"{output_path}.checkpoint")
+    watermark = checkpoint.load() if resume else 0
+    already_done = _completed_lines(output_path, watermark) if resume else set()
+    if not resume and os.path.exists(output_path):
+        raise ValueError(f"{output_path} already exists; pass resume=True to continue it")
+
+    store = PetStore(store_dir) if store_dir else None
+    writer = _ResultWriter(output_path, checkpoint, watermark, already_done, checkpoint_every, stats)
+    source = f"replay:{os.path.abspath(input_path)}:"
+    journaled_through: Dict[str, int] = {}
+    pool = [
+        _ReplayWorker(i, writer.results, pet_factory, store, queue_size, max_resident, source,
+                      journaled_through, watermark if resume else None)
+        for i in range(workers)
+    ]
+    if store is not None:
+        # Compaction drops the journal's input-line tags, so a pet is only compacted once every
+        # line it journaled is behind the saved checkpoint and a resume will not look for it
+        store.start_compactor(ready=lambda pet_id: journaled_through.get(pet_id, 0) <= writer.durable)
+    writer.start()
+    for worker in pool:
+        worker.start()
+
+    skipped = lambda line: line <= watermark or line in already_done
+    last_line = watermark
+    try:
+        for record in read_records(input_path, skipped):
+            # Blank lines in between never reach a worker; let the writer count them as done
+            for blank in range(last_line + 1, record["line"]):
+                if not skipped(blank):
+                    writer.results.put({"line": blank, "blank": True})
+            last_line = record["line"]
+            if "error" in record:
+                writer.results.put(record)
+                continue
+            target = pool[_shard(record["pet_id"], workers)]
+            target.inbox.put(ReplayRecord(record["line"], record["pet_id"], record["interaction"]))
+    finally:
+        for worker in pool:
+            worker.inbox.put(_DONE)
+        for worker in pool:
+            worker.join()
+        writer.results.put(_DONE)
+        writer.join()
+        if store is not None:
+            store.stop_compactor()
+
+    stats.skipped = len(already_done) + watermark
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def _batch_request(kind: str, key: str, system_message: str, interaction: str) -> dict:
+    return {
+        "custom_id": f"{kind}:{key}",
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": get_config().model,
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {"role": "system", "content": compact_lines(system_message)},
+                {"role": "user", "content": delta_user_message(interaction)}
+            ]
+        }
+    }
+
+
+def emit_batch_requests(input_path: str, output_dir: str, max_requests_per_file: int = MAX_BATCH_REQUESTS) -> int:
+    # Writes the emotional and physical delta calls as provider batch input files instead of calling
+    # the model. These are the only calls that depend on the interaction alone; after the results
+    # are imported into the delta cache, a replay serves them from there. Interactions already
+    # cached, or repeated in the input, are written once at most.
+    os.makedirs(output_dir, exist_ok=True)
+    cache = get_delta_cache()
+    seen: Set[str] = set()
+    written, file_index, in_file, out = 0, 0, 0, None
+    prompts = (("emotional", EMOTIONAL_DELTA_SYSTEM_MESSAGE), ("physical", PHYSICAL_DELTA_SYSTEM_MESSAGE))
+    try:
+        for record in read_records(input_path):
+            if "error" in record:
+                continue
+            for kind, system_message in prompts:
+                key = delta_cache_key(kind, record["interaction"])
+                if key in seen or cache.get(key) is not None:
+                    continue
+                seen.add(key)
+                if out is None or in_file >= max_requests_per_file:
+                    if out is not None:
+                        out.close()
+                    file_index += 1
+                    in_file = 0
+                    out = open(os.path.join(output_dir, f"batch-{file_index:05d}.jsonl"), "w", encoding="utf-8")
+                out.write(json.dumps(_batch_request(kind, key, system_message, record["interaction"])) + "\n")
+                in_file += 1
+                written += 1
+    finally:
+        if out is not None:
+            out.close()
+    return written
+
+
+def import_batch_results(results_path: str) -> Dict[str, int]:
+    # Loads a provider batch output file into the delta cache. Configure PET_DELTA_CACHE_PATH so the
+    # entries outlive this process.
+    cache = get_delta_cache()
+    counts = {"imported": 0, "failed": 0}
+    with open(results_path, "r", encoding="utf-8") as f:
+        for text in f:
+            if not text.strip():
+                continue
+            try:
+                result = json.loads(text)
+                kind, key = result["custom_id"].split(":", 1)
+                response = result.get("response") or {}
+                if result.get("error") or response.get("status_code", 200) != 200:
+                    raise ValueError(result.get("error") or f"status {response.get('status_code')}")
+                expected = EMOTIONAL_VARIABLES if kind == "emotional" else PHYSICAL_VARIABLES
+                # Same checks as a live call, so nothing invalid reaches the persistent cache
+                cache.set(key, parse_delta_content(response["body"]["choices"][0]["message"]["content"], expected))
+                counts["imported"] += 1
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                print(f"Skipping batch result: {str(e)}")
+                counts["failed"] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk replay of recorded pet interactions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Replay interactions through the pet model")
+    run.add_argument("input")
+    run.add_argument("-o", "--output", required=True)
+    run.add_argument("--workers", type=int, default=8, help="Pets processed concurrently")
+    run.add_argument("--queue-size", type=int, default=32, help="Buffered interactions per worker")
+    run.add_argument("--store", help="PetStore directory; pets are loaded from and journaled to it")
+    run.add_argument("--max-resident", type=int, default=1024, help="Pets kept in memory per worker (with --store)")
+    run.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    run.add_argument("--checkpoint-every", type=int, default=100)
+    run.add_argument("--resume", action="store_true", help="Continue an interrupted replay (requires --store)")
+
+    emit = commands.add_parser("emit-batch", help="Write delta calls as provider batch input files")
+    emit.add_argument("input")
+    emit.add_argument("-o", "--output-dir", required=True)
+    emit.add_argument("--max-requests-per-file", type=int, default=MAX_BATCH_REQUESTS)
+
+    load = commands.add_parser("import-batch", help="Load provider batch results into the delta cache")
+    load.add_argument("results")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        if args.resume and not args.store:
+            parser.error("--resume requires --store: without it pets are not persisted between runs")
+        from main import create_initial_pet
+        stats = run_replay(
+            args.input, args.output, create_initial_pet, workers=args.workers, queue_size=args.queue_size,
+            store_dir=args.store, max_resident=args.max_resident, checkpoint_path=args.checkpoint,
+            resume=args.resume, checkpoint_every=args.checkpoint_every
+        )
+        print(f"Replayed {stats.processed} interactions ({stats.failed} failed, {stats.skipped} already done) "
+              f"in {stats.elapsed:.1f}s")
+    elif args.command == "emit-batch":
+        written = emit_batch_requests(args.input, args.output_dir, args.max_requests_per_file)
+        print(f"Wrote {written} batch requests to {args.output_dir}")
+    else:
+        counts = import_batch_results(args.results)
+        print(f"Imported {counts['imported']} cached deltas ({counts['failed']} failed)")
+
+
+if __name__ == "__main__":
+    main()
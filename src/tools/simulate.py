@@ -0,0 +1,281 @@
+# src/tools/simulate.py
+# Headless simulated players for load tests and tuning. Runs entirely on the stub LLM backend,
+# and the same seed always produces the same populations, choices and trajectories.
+#
+#     python -m src.tools.simulate --sessions 2000 --turns 30 --policy random --processes 8 --seed 7
+#     python -m src.tools.simulate --sessions 100 --policy script --script messages.txt -o summary.json
+import argparse
+import json
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from src.core.memory import LongTermMemory, ShortTermMemory
+from src.core.pet import Pet
+from src.core.states import (
+    EmotionalState, PhysicalState, PhysicalDescription, LatentVariable, EMOTIONAL_VARIABLES, PHYSICAL_VARIABLES
+)
+
+STATE_VARIABLES = EMOTIONAL_VARIABLES + PHYSICAL_VARIABLES
+
+NAMES = ["Buddy", "Luna", "Milo", "Daisy", "Pixel", "Mochi", "Biscuit", "Pepper", "Nova", "Ziggy", "Clover", "Otis"]
+SPECIES = ["dog", "cat", "rabbit", "hamster", "parrot", "fox", "dragon"]
+COLORS = ["golden", "black", "white", "grey", "brown", "spotted", "ginger", "blue"]
+SIZES = ["tiny", "small", "medium", "large"]
+FEATURES = ["floppy ears", "wagging tail", "green eyes", "fluffy coat", "tiny wings", "striped tail",
+            "long whiskers", "one white paw", "curly fur", "big paws"]
+
+FREEFORM_MESSAGES = [
+    "I throw the ball across the yard",
+    "I give my pet a gentle belly rub",
+    "I fill the food bowl with treats",
+    "We go for a long walk in the park",
+    "I brush its fur until it shines",
+    "I leave it alone and watch TV",
+    "I show it a strange new toy",
+    "I scold it for chewing my shoes",
+    "We take a nap together on the couch",
+    "I give it a warm bath",
+]
+
+
+def generate_pet(rng: random.Random) -> Pet:
+    def variables(names):
+        return [LatentVariable(name, round(rng.uniform(20, 80), 1)) for name in names]
+
+    description = PhysicalDescription(
+        species=rng.choice(SPECIES),
+        color=rng.choice(COLORS),
+        size=rng.choice(SIZES),
+        distinctive_features=rng.sample(FEATURES, rng.randint(1, 3))
+    )
+    return Pet(
+        emotional_state=EmotionalState(variables(EMOTIONAL_VARIABLES)),
+        physical_state=PhysicalState(variables(PHYSICAL_VARIABLES), description),
+        long_term_memory=LongTermMemory(),
+        short_term_memory=ShortTermMemory(),
+        name=rng.choice(NAMES),
+        age=rng.randint(1, 12)
+    )
+
+
+class PlayerPolicy:
+    def choose(self, game, rng: random.Random) -> str:
+        raise NotImplementedError
+
+
+class RandomPolicy(PlayerPolicy):
+    # Picks one of the listed choices, or with freeform_rate types one of the freeform messages
+    def __init__(self, freeform_rate: float = 0.3, messages: Sequence[str] = FREEFORM_MESSAGES):
+        self.freeform_rate = freeform_rate
+        self.messages = list(messages)
+
+    def choose(self, game, rng: random.Random) -> str:
+        choices = game.current_scenario.choices
+        if not choices or rng.random() < self.freeform_rate:
+            return rng.choice(self.messages)
+        return str(rng.randint(1, len(choices)))
+
+
+class ScriptedPolicy(PlayerPolicy):
+    # Plays the same messages in order, wrapping around; numbers pick listed choices as usual
+    def __init__(self, messages: Sequence[str]):
+        if not messages:
+            raise ValueError("A scripted policy needs at least one message")
+        self.messages = list(messages)
+        self._turn = 0
+
+    def choose(self, game, rng: random.Random) -> str:
+        message = self.messages[self._turn % len(self.messages)]
+        self._turn += 1
+        return message
+
+
+def make_policy(name: str, script: Optional[List[str]] = None) -> PlayerPolicy:
+    if name == "random":
+        return RandomPolicy()
+    if name == "choices":
+        return RandomPolicy(freeform_rate=0.0)
+    if name == "freeform":
+        return RandomPolicy(freeform_rate=1.0)
+    if name == "script":
+        return ScriptedPolicy(script or [])
+    raise ValueError(f"Unknown policy: {name}")
+
+
+@dataclass
+class SessionSpec:
+    index: int
+    seed: int
+    turns: int
+    policy: str
+    script: Optional[List[str]] = None
+
+
+def session_seed(seed: int, index: int) -> int:
+    # Independent of how sessions are split across processes
+    return random.Random(f"{seed}:{index}").getrandbits(32)
+
+
+def _init_worker(latency: float):
+    # Each process gets an offline backend and no delta cache: cached deltas would make a session's
+    # outcome depend on which sessions ran before it in the same process
+    from src.core.cache import DeltaCache, set_delta_cache
+    set_delta_cache(DeltaCache(max_entries=0))
+    _configure_backend(latency, 0)
+
+
+def _configure_backend(latency: float, seed: int):
+    from src.core.backends import StubBackend
+    from src.core.llm import set_backend
+    backend = StubBackend(latency=latency, seed=seed)
+    set_backend(backend)
+    return backend
+
+
+def _state_row(pet: Pet) -> List[float]:
+    # Both states keep their values in STATE_VARIABLES order
+    return list(pet.emotional_state.values) + list(pet.physical_state.values)
+
+
+def run_session(spec: SessionSpec, latency: float = 0.0) -> dict:
+    # Scenario templates, random events and action templates draw from the module-level random,
+    # so it is reseeded per session; prefetch stays off to keep every draw on this thread
+    from src.game.game import Game
+    from src.game.scenario import generate_dynamic_scenario
+
+    random.seed(spec.seed)
+    rng = random.Random(spec.seed)
+    backend = _configure_backend(latency, spec.seed)
+    policy = make_policy(spec.policy, spec.script)
+
+    pet = generate_pet(rng)
+    game = Game(pet, generate_dynamic_scenario(pet, None, None, None))
+    trajectory = [_state_row(game.pet)]
+    latencies, calls = [], []
+    for _ in range(spec.turns):
+        message = policy.choose(game, rng)
+        before = backend.call_count
+        started = time.perf_counter()
+        game.process_message(message)
+        latencies.append(time.perf_counter() - started)
+        calls.append(backend.call_count - before)
+        trajectory.append(_state_row(game.pet))
+
+    return {
+        "index": spec.index,
+        "seed": spec.seed,
+        "pet": {"name": pet.name, "species": pet.physical_state.description.species},
+        "trajectory": trajectory,
+        "latencies": latencies,
+        "llm_calls": calls
+    }
+
+
+def _run_shard(specs: List[SessionSpec], latency: float) -> List[dict]:
+    return [run_session(spec, latency) for spec in specs]
+
+
+def simulate(sessions: int, turns: int, policy: str = "random", seed: int = 0, processes: int = 4,
+             shard_size: int = 16, latency: float = 0.0, script: Optional[List[str]] = None) -> List[dict]:
+    specs = [SessionSpec(i, session_seed(seed, i), turns, policy, script) for i in range(sessions)]
+    shards = [specs[i:i + shard_size] for i in range(0, len(specs), shard_size)]
+    if processes <= 1:
+        _init_worker(latency)
+        results = [result for shard in shards for result in _run_shard(shard, latency)]
+    else:
+        # Spawned rather than forked: a forked child inherits the updater thread pool's bookkeeping
+        # but not its threads, so work submitted to it would never run
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker,
+                                 initargs=(latency,)) as pool:
+            results = [result for shard in pool.map(_run_shard, shards, [latency] * len(shards))
+                       for result in shard]
+    return sorted(results, key=lambda result: result["index"])
+
+
+def aggregate(results: List[dict]) -> dict:
+    trajectories = np.array([result["trajectory"] for result in results], dtype=np.float64)
+    latencies = np.array([latency for result in results for latency in result["latencies"]])
+    calls = np.array([count for result in results for count in result["llm_calls"]])
+    final = trajectories[:, -1, :]
+    return {
+        "sessions": len(results),
+        "turns": trajectories.shape[1] - 1,
+        # Mean and 10th/90th percentile of every variable at every turn, across sessions
+        "trajectory": {
+            name: {
+                "mean": trajectories[:, :, i].mean(axis=0).round(2).tolist(),
+                "p10": np.percentile(trajectories[:, :, i], 10, axis=0).round(2).tolist(),
+                "p90": np.percentile(trajectories[:, :, i], 90, axis=0).round(2).tolist()
+            }
+            for i, name in enumerate(STATE_VARIABLES)
+        },
+        "final": {
+            name: {"mean": round(float(final[:, i].mean()), 2), "std": round(float(final[:, i].std()), 2),
+                   "at_min": int((final[:, i] <= -100).sum()), "at_max": int((final[:, i] >= 100).sum())}
+            for i, name in enumerate(STATE_VARIABLES)
+        },
+        "turn_latency_ms": {
+            "p50": round(float(np.percentile(latencies, 50)) * 1000, 3) if latencies.size else 0.0,
+            "p95": round(float(np.percentile(latencies, 95)) * 1000, 3) if latencies.size else 0.0,
+            "p99": round(float(np.percentile(latencies, 99)) * 1000, 3) if latencies.size else 0.0
+        },
+        "llm_calls_per_turn": round(float(calls.mean()), 3) if calls.size else 0.0,
+        # Turns whose only model call was the next scenario, i.e. known actions handled locally
+        "local_turns": round(float((calls <= 1).mean()), 3) if calls.size else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run simulated players against Game, offline")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--policy", choices=["random", "choices", "freeform", "script"], default="random")
+    parser.add_argument("--script", help="File with one player message per line (for --policy script)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--shard-size", type=int, default=16, help="Sessions per task sent to a process")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument("-o", "--output", help="Write the aggregate summary as JSON")
+    parser.add_argument("--sessions-output", help="Write every session's trajectory as JSONL")
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = [line.strip() for line in f if line.strip()]
+
+    started = time.perf_counter()
+    results = simulate(args.sessions, args.turns, args.policy, args.seed, args.processes,
+                       args.shard_size, args.latency, script)
+    elapsed = time.perf_counter() - started
+    summary = aggregate(results)
+
+    print(f"{summary['sessions']} sessions x {summary['turns']} turns in {elapsed:.1f}s "
+          f"({summary['sessions'] * summary['turns'] / elapsed:.0f} turns/s)")
+    latency = summary["turn_latency_ms"]
+    print(f"turn latency p50 {latency['p50']:.2f} ms, p95 {latency['p95']:.2f} ms, p99 {latency['p99']:.2f} ms; "
+          f"{summary['llm_calls_per_turn']:.2f} LLM calls/turn, {summary['local_turns']:.0%} turns resolved locally")
+    print(f"{'variable':<12} {'start':>8} {'final':>8} {'std':>8} {'at -100':>8} {'at 100':>8}")
+    for name in STATE_VARIABLES:
+        final = summary["final"][name]
+        print(f"{name:<12} {summary['trajectory'][name]['mean'][0]:8.1f} {final['mean']:8.1f} {final['std']:8.1f} "
+              f"{final['at_min']:8d} {final['at_max']:8d}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    if args.sessions_output:
+        with open(args.sessions_output, "w") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# src/utils/config.py
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+
+@dataclass(frozen=True)
+class LLMConfig:
+    api_key: Optional[str] = None
+    base_url: Optional[str] = None
+    model: str = "gpt-4o-mini"
+    # "openai", or "stub" for the offline deterministic backend
+    backend: str = "openai"
+    stub_latency: float = 0.0
+    stub_jitter: float = 0.0
+    stub_failure_rate: float = 0.0
+    stub_seed: int = 0
+    # Connection pool shared by every LLM call in the process
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    # Timeouts in seconds
+    connect_timeout: float = 5.0
+    read_timeout: float = 60.0
+    # Each attempt gets call_timeout seconds; all attempts of one call together get call_deadline
+    call_timeout: float = 20.0
+    call_deadline: float = 45.0
+    max_retries: int = 2
+    retry_base_delay: float = 0.25
+    retry_max_delay: float = 4.0
+    # Consecutive failures that open the shared circuit breaker, and how long it stays open
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    # Concurrent identical requests (same prompt, model and parameters) share one call
+    single_flight: bool = True
+    # Delta requests arriving within delta_batch_wait seconds of each other are sent as one call of up
+    # to delta_batch_size interactions; a size of 1 sends every request on its own
+    delta_batch_size: int = 1
+    delta_batch_wait: float = 0.02
+    # Interaction-to-delta cache; a path enables the on-disk SQLite tier
+    delta_cache_size: int = 1024
+    delta_cache_ttl: float = 86400.0
+    delta_cache_path: Optional[str] = None
+    # Trace sinks, e.g. "ring,metrics,jsonl:traces.jsonl"; empty turns tracing off
+    trace_sinks: str = ""
+
+
+# Environment variable for every field. The same names are read from the .env file.
+ENV_NAMES: Dict[str, str] = {
+    "api_key": "OPENAI_API_KEY",
+    "base_url": "OPENAI_BASE_URL",
+    "model": "PET_LLM_MODEL",
+    "backend": "PET_LLM_BACKEND",
+    "stub_latency": "PET_STUB_LATENCY",
+    "stub_jitter": "PET_STUB_JITTER",
+    "stub_failure_rate": "PET_STUB_FAILURE_RATE",
+    "stub_seed": "PET_STUB_SEED",
+    "max_connections": "PET_LLM_MAX_CONNECTIONS",
+    "max_keepalive_connections": "PET_LLM_MAX_KEEPALIVE_CONNECTIONS",
+    "keepalive_expiry": "PET_LLM_KEEPALIVE_EXPIRY",
+    "connect_timeout": "PET_LLM_CONNECT_TIMEOUT",
+    "read_timeout": "PET_LLM_READ_TIMEOUT",
+    "call_timeout": "PET_LLM_CALL_TIMEOUT",
+    "call_deadline": "PET_LLM_CALL_DEADLINE",
+    "max_retries": "PET_LLM_MAX_RETRIES",
+    "retry_base_delay": "PET_LLM_RETRY_BASE_DELAY",
+    "retry_max_delay": "PET_LLM_RETRY_MAX_DELAY",
+    "breaker_failure_threshold": "PET_LLM_BREAKER_THRESHOLD",
+    "breaker_reset_timeout": "PET_LLM_BREAKER_RESET",
+    "single_flight": "PET_LLM_SINGLE_FLIGHT",
+    "delta_batch_size": "PET_LLM_DELTA_BATCH_SIZE",
+    "delta_batch_wait": "PET_LLM_DELTA_BATCH_WAIT",
+    "delta_cache_size": "PET_DELTA_CACHE_SIZE",
+    "delta_cache_ttl": "PET_DELTA_CACHE_TTL",
+    "delta_cache_path": "PET_DELTA_CACHE_PATH",
+    "trace_sinks": "PET_TRACE_SINKS",
+}
+
+# Optional JSON file of field values, e.g. {"model": "gpt-4o", "delta_cache_size": 0}
+CONFIG_FILE_ENV = "PET_CONFIG_FILE"
+DEFAULT_CONFIG_FILE = "pet_config.json"
+ENV_FILE_ENV = "PET_ENV_FILE"
+
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _coerce(name: str, value) -> Any:
+    # Values from .env and the environment are strings; empty means "not set"
+    default = getattr(LLMConfig, name)
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return default
+    if isinstance(default, bool):
+        return value if isinstance(value, bool) else str(value).lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value if value is None else str(value)
+
+
+def _find_file(explicit: Optional[str], name: str) -> Optional[Path]:
+    # An explicit path must exist; otherwise look in the working directory, then the repository root
+    if explicit:
+        path = Path(explicit)
+        if not path.is_file():
+            raise FileNotFoundError(f"Configuration file not found: {explicit}")
+        return path
+    for directory in (Path.cwd(), _REPO_ROOT):
+        path = directory / name
+        if path.is_file():
+            return path
+    return None
+
+
+def _file_values(path: Optional[Path]) -> Dict[str, Any]:
+    if path is None:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        values = json.load(f)
+    unknown = set(values) - set(ENV_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown settings in {path}: {', '.join(sorted(unknown))}")
+    return values
+
+
+def _dotenv_values(path: Optional[Path]) -> Dict[str, Optional[str]]:
+    # python-dotenv is only imported when there is a .env file to read
+    if path is None:
+        return {}
+    from dotenv import dotenv_values
+    return dict(dotenv_values(path))
+
+
+def _env_layer(values: Mapping[str, Optional[str]]) -> Dict[str, Any]:
+    return {name: values[env] for name, env in ENV_NAMES.items() if values.get(env) is not None}
+
+
+def load_config(environ: Optional[Mapping[str, str]] = None) -> LLMConfig:
+    # Layered, later sources winning: defaults < config file < .env < process environment.
+    # Unlike the old load_dotenv(override=True) call, the .env file no longer overrides variables
+    # already set in the environment, and it is not copied into os.environ.
+    environ = os.environ if environ is None else environ
+    settings: Dict[str, Any] = {}
+    settings.update(_file_values(_find_file(environ.get(CONFIG_FILE_ENV), DEFAULT_CONFIG_FILE)))
+    settings.update(_env_layer(_dotenv_values(_find_file(environ.get(ENV_FILE_ENV), ".env"))))
+    settings.update(_env_layer(environ))
+    return LLMConfig(**{name: _coerce(name, value) for name, value in settings.items()})
+
+
+_config: Optional[LLMConfig] = None
+_config_lock = threading.Lock()
+
+
+def get_config() -> LLMConfig:
+    # The configuration file, .env file and environment are read once per process
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = load_config()
+    return _config
+
+
+def set_config(config: LLMConfig):
+    global _config
+    with _config_lock:
+        _config = config
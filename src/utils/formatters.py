@@ -1,5 +1,27 @@
 # src/utils/formatters.py
+import json
+
+# Renders are memoized on the pet (Pet.render) and rebuilt only after its version changes
+
+
 def format_pet_state(pet):
+    return pet.render("state_text", _format_pet_state)
+
+
+def format_pet_memories(pet):
+    return pet.render("memories_text", _format_pet_memories)
+
+
+def pet_state_dict(pet):
+    # Structured view for API clients. The dict is shared between calls, so treat it as read-only.
+    return pet.render("state_dict", _pet_state_dict)
+
+
+def pet_state_json(pet):
+    return pet.render("state_json", lambda p: json.dumps(pet_state_dict(p)))
+
+
+def _format_pet_state(pet):
     formatted_state = f"""
 {pet.name}'s Current State:
 -----------------------------
@@ -15,9 +37,9 @@ Distinctive features: {', '.join(pet.physical_state.description.distinctive_feat
     return formatted_state.strip()
 
 
-def format_pet_memories(pet):
+def _format_pet_memories(pet):
     short_term = "\n".join(
-        [f"- {memory.content}" for memory in pet.short_term_memory.events[-5:]]
+        [f"- {memory.content}" for memory in list(pet.short_term_memory.events)[-5:]]
     )
     long_term_people = "\n".join(
         [
@@ -55,3 +77,27 @@ Places:
 {long_term_places}
     """
     return formatted_memories.strip()
+
+
+def _pet_state_dict(pet):
+    description = pet.physical_state.description
+    long_term = pet.long_term_memory
+    return {
+        "name": pet.name,
+        "age": pet.age,
+        "version": pet.version,
+        "emotional_state": pet.emotional_state.as_dict(),
+        "physical_state": pet.physical_state.as_dict(),
+        "description": {
+            "species": description.species,
+            "color": description.color,
+            "size": description.size,
+            "distinctive_features": list(description.distinctive_features)
+        },
+        "memories": {
+            "recent": [memory.content for memory in list(pet.short_term_memory.events)[-5:]],
+            "people": {key: memory.content for key, memory in long_term.people.items()},
+            "events": {key: memory.content for key, memory in long_term.events.items()},
+            "places": {key: memory.content for key, memory in long_term.places.items()}
+        }
+    }
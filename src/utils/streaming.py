@@ -0,0 +1,121 @@
+# src/utils/streaming.py
+from typing import Callable, Generator, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class JsonStringFieldParser:
+    # Incrementally extracts the string value of one top-level field from streamed JSON text.
+    # feed() returns only the newly decoded characters, so callers can show them as they arrive.
+
+    def __init__(self, field: str):
+        self.field = field
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._token = []
+        self._last_string: Optional[str] = None
+        self._awaiting_value = False
+        self._emitting = False
+        self._unicode: Optional[str] = None
+        self._pending_surrogate: Optional[int] = None
+
+    def feed(self, chunk: str) -> str:
+        out = []
+        for char in chunk:
+            if self.done:
+                break
+            if self._emitting:
+                self._emit_char(char, out)
+            elif self._in_string:
+                self._scan_string_char(char)
+            elif self._awaiting_value:
+                if char.isspace():
+                    continue
+                self._awaiting_value = False
+                if char == '"':
+                    self._emitting = True
+                else:
+                    # The field is not a string, there is nothing to stream
+                    self.done = True
+            elif char == '"':
+                self._in_string = True
+                self._token = []
+            elif char in "{[":
+                self._depth += 1
+                self._last_string = None
+            elif char in "}]":
+                self._depth -= 1
+                self._last_string = None
+            elif char == ":":
+                self._awaiting_value = self._depth == 1 and self._last_string == self.field
+                self._last_string = None
+            elif not char.isspace():
+                self._last_string = None
+        return "".join(out)
+
+    def _scan_string_char(self, char: str):
+        if self._escape:
+            self._escape = False
+            self._token.append(char)
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            self._last_string = "".join(self._token) if self._depth == 1 else None
+        else:
+            self._token.append(char)
+
+    def _emit_char(self, char: str, out: list):
+        if self._unicode is not None:
+            self._unicode += char
+            if len(self._unicode) == 4:
+                self._emit_code_point(int(self._unicode, 16), out)
+                self._unicode = None
+        elif self._escape:
+            self._escape = False
+            if char == "u":
+                self._unicode = ""
+            else:
+                out.append(_ESCAPES.get(char, char))
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._emitting = False
+            self.done = True
+        else:
+            out.append(char)
+
+    def _emit_code_point(self, code: int, out: list):
+        if 0xD800 <= code < 0xDC00:
+            self._pending_surrogate = code
+            return
+        if 0xDC00 <= code < 0xE000 and self._pending_surrogate is not None:
+            code = 0x10000 + ((self._pending_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._pending_surrogate = None
+        out.append(chr(code))
+
+
+def stream_json_field(chunks: Iterator[str], field: str) -> Generator[str, None, str]:
+    # Yields decoded pieces of `field` while consuming raw JSON chunks, and returns the full raw text
+    parser = JsonStringFieldParser(field)
+    raw = []
+    for chunk in chunks:
+        raw.append(chunk)
+        text = parser.feed(chunk)
+        if text:
+            yield text
+    return "".join(raw)
+
+
+def drain(stream: Generator[str, None, T], on_chunk: Callable[[str], None]) -> T:
+    # Runs a streaming generator to completion, handing each chunk to a callback, and returns its result
+    while True:
+        try:
+            chunk = next(stream)
+        except StopIteration as stop:
+            return stop.value
+        on_chunk(chunk)
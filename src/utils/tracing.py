@@ -0,0 +1,316 @@
+# src/utils/tracing.py
+import bisect
+import contextvars
+import functools
+import json
+import secrets
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Span currently open on this thread/context; children started inside it inherit its trace
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start: float = 0.0
+    duration: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def record_error(self, e: BaseException):
+        self.error = f"{type(e).__name__}: {e}"
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class _NoopSpan:
+    # Handed out while tracing is off, so instrumented code never has to check
+    def set(self, **attributes):
+        pass
+
+    def record_error(self, e: BaseException):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class SpanSink:
+    def emit(self, span: Span):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class RingSink(SpanSink):
+    # Keeps the most recent spans in memory, e.g. for debugging a slow turn after the fact
+    def __init__(self, capacity: int = 1024):
+        self._spans: Deque[Span] = deque(maxlen=capacity)
+
+    def emit(self, span: Span):
+        self._spans.append(span)
+
+    def spans(self, name: Optional[str] = None) -> List[Span]:
+        spans = list(self._spans)
+        return spans if name is None else [span for span in spans if span.name == name]
+
+    def trace(self, trace_id: str) -> List[Span]:
+        return [span for span in list(self._spans) if span.trace_id == trace_id]
+
+    def clear(self):
+        self._spans.clear()
+
+
+class JsonlSink(SpanSink):
+    # One JSON object per finished span
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def emit(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class MetricsSink(SpanSink):
+    # Aggregates spans into counters and latency histograms, rendered in the Prometheus text format
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, prefix: str = "pet"):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counts: Dict[str, List[int]] = {}
+        self._sums: Dict[str, float] = defaultdict(float)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._tokens: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._finish_reasons: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def emit(self, span: Span):
+        with self._lock:
+            counts = self._counts.get(span.name)
+            if counts is None:
+                counts = self._counts[span.name] = [0] * (len(self.buckets) + 1)
+            counts[bisect.bisect_left(self.buckets, span.duration)] += 1
+            self._sums[span.name] += span.duration
+            if span.error is not None:
+                self._errors[span.name] += 1
+            for kind in ("prompt_tokens", "completion_tokens"):
+                if span.attributes.get(kind):
+                    self._tokens[(span.name, kind[:-len("_tokens")])] += span.attributes[kind]
+            if span.attributes.get("finish_reason"):
+                self._finish_reasons[(span.name, span.attributes["finish_reason"])] += 1
+
+    def render(self) -> str:
+        p = self.prefix
+        with self._lock:
+            lines = [
+                f"# HELP {p}_span_duration_seconds Time spent in each instrumented stage",
+                f"# TYPE {p}_span_duration_seconds histogram"
+            ]
+            for name in sorted(self._counts):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), self._counts[name]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{p}_span_duration_seconds_bucket{{span="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{p}_span_duration_seconds_sum{{span="{name}"}} {self._sums[name]}')
+                lines.append(f'{p}_span_duration_seconds_count{{span="{name}"}} {cumulative}')
+
+            lines.append(f"# HELP {p}_span_errors_total Spans that ended in a failure")
+            lines.append(f"# TYPE {p}_span_errors_total counter")
+            for name in sorted(self._counts):
+                lines.append(f'{p}_span_errors_total{{span="{name}"}} {self._errors[name]}')
+
+            lines.append(f"# HELP {p}_llm_tokens_total Prompt and completion tokens per LLM call site")
+            lines.append(f"# TYPE {p}_llm_tokens_total counter")
+            for (name, kind), total in sorted(self._tokens.items()):
+                lines.append(f'{p}_llm_tokens_total{{span="{name}",kind="{kind}"}} {total}')
+
+            lines.append(f"# HELP {p}_llm_finish_reason_total Completions by finish reason")
+            lines.append(f"# TYPE {p}_llm_finish_reason_total counter")
+            for (name, reason), total in sorted(self._finish_reasons.items()):
+                lines.append(f'{p}_llm_finish_reason_total{{span="{name}",reason="{reason}"}} {total}')
+        return "\n".join(lines) + "\n"
+
+
+class _ActiveSpan:
+    __slots__ = ("tracer", "span", "activate", "token", "started")
+
+    def __init__(self, tracer: 'Tracer', span: Span, activate: bool):
+        self.tracer = tracer
+        self.span = span
+        self.activate = activate
+        self.token = None
+
+    def __enter__(self) -> Span:
+        if self.activate:
+            self.token = _current_span.set(self.span)
+        self.span.start = time.time()
+        self.started = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.duration = time.perf_counter() - self.started
+        if exc is not None and self.span.error is None:
+            self.span.record_error(exc)
+        if self.token is not None:
+            try:
+                _current_span.reset(self.token)
+            except ValueError:
+                # Exited from a different context than it was entered in (e.g. a generator)
+                _current_span.set(None)
+        self.tracer.emit(self.span)
+        return False
+
+
+class Tracer:
+    # Tracing is off while there are no sinks; spans then cost a single attribute check
+    def __init__(self, sinks: Optional[List[SpanSink]] = None):
+        self.sinks: List[SpanSink] = list(sinks or [])
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sinks)
+
+    def add_sink(self, sink: SpanSink) -> SpanSink:
+        self.sinks = self.sinks + [sink]
+        return sink
+
+    def remove_sink(self, sink: SpanSink):
+        self.sinks = [s for s in self.sinks if s is not sink]
+
+    def find_sink(self, kind: type) -> Optional[SpanSink]:
+        return next((sink for sink in self.sinks if isinstance(sink, kind)), None)
+
+    def span(self, name: str, activate: bool = True, **attributes):
+        # activate=False keeps the span out of the context, for spans held open across yields
+        if not self.sinks:
+            return _NOOP_SPAN
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent is not None else secrets.token_hex(8),
+            span_id=secrets.token_hex(4),
+            parent_id=parent.span_id if parent is not None else None,
+            attributes=attributes
+        )
+        return _ActiveSpan(self, span, activate)
+
+    def emit(self, span: Span):
+        for sink in self.sinks:
+            try:
+                sink.emit(span)
+            except Exception as e:
+                print(f"An error occurred while recording span {span.name}: {str(e)}")
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def build_sinks(spec: str) -> List[SpanSink]:
+    # Comma-separated list such as "ring,metrics,jsonl:traces.jsonl"
+    sinks: List[SpanSink] = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        kind, _, argument = entry.partition(":")
+        if kind == "ring":
+            sinks.append(RingSink(int(argument) if argument else 1024))
+        elif kind == "jsonl":
+            sinks.append(JsonlSink(argument or "traces.jsonl"))
+        elif kind == "metrics":
+            sinks.append(MetricsSink())
+        else:
+            raise ValueError(f"Unknown trace sink: {kind}")
+    return sinks
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                from .config import get_config
+                _tracer = Tracer(build_sinks(get_config().trace_sinks))
+    return _tracer
+
+
+def set_tracer(tracer: Optional[Tracer]):
+    # None falls back to the sinks named in configuration
+    global _tracer
+    with _tracer_lock:
+        _tracer = tracer
+
+
+def span(name: str, activate: bool = True, **attributes):
+    return get_tracer().span(name, activate, **attributes)
+
+
+def current_span():
+    return _current_span.get() or _NOOP_SPAN
+
+
+def record_error(e: BaseException):
+    # For failures that are handled (and printed) rather than raised
+    current_span().record_error(e)
+
+
+def traced(name: str):
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.sinks:
+                return fn(*args, **kwargs)
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(fn: Callable) -> Callable:
+    # Runs fn in a copy of the caller's context so spans opened on pool threads join the caller's trace
+    if not get_tracer().sinks:
+        return fn
+    context = contextvars.copy_context()
+    return functools.partial(context.run, fn)